@@ -0,0 +1,3 @@
+"""
+This package contains the benchmark suite of the nr_cisco_maintenance.py script with synthetic fleets.
+"""
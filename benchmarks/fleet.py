@@ -0,0 +1,235 @@
+"""
+This module contains the generators of the synthetic fleets for the benchmark suite. A fleet is a serials dict
+of stacked switches and appliances and its input files, which are a static_serials.yaml file, a Nornir
+SimpleInventory, an IBM TSS workbook and the ENTITY-MIB data files of the snmpsim SNMP simulator. Every fleet
+is generated from a seed, so the same scale always gets the same serial numbers.
+"""
+
+import os
+import random
+import string
+import yaml
+
+
+__author__ = "Willi Kubny"
+__maintainer__ = "Willi Kubny"
+__license__ = "MIT"
+__email__ = "willi.kubny@kyndryl.com"
+__status__ = "Production"
+
+
+# Default fleet scales in serial numbers of the benchmark suite
+FLEET_SCALES = (1000, 10000, 50000, 200000)
+# Serial number prefixes of the Cisco manufacturing locations
+SERIAL_PREFIXES = ("FOC", "FCW", "FDO", "FCH", "JMX", "WZP", "FJC", "JAE")
+# Device roles with the number of switches per host and the current and desired software version
+DEVICE_ROLES = (
+    ("access", (1, 2, 3, 4), "17.6.5", "17.9.4a"),
+    ("distribution", (1, 2), "17.9.4a", "17.9.4a"),
+    ("core", (1,), "16.12.9", "17.9.4a"),
+    ("firewall", (1,), "7.0.4", "7.0.4"),
+)
+# The entPhysicalTable of the ENTITY-MIB with the entPhysicalClass values of a chassis and of a switch stack
+ENT_PHYSICAL_TABLE = "1.3.6.1.2.1.47.1.1.1.1"
+ENT_PHYSICAL_CLASS_CHASSIS = 3
+ENT_PHYSICAL_CLASS_STACK = 11
+# Columns of the synthetic IBM TSS workbook, which the report renames to the tss_ prefixed lower case names
+TSS_COLUMNS = ("Serial", "Status", "Contract", "Service Level")
+
+
+#### Functions ###############################################################################################
+
+
+def generate_serials(count: int, seed: int = 0) -> dict:
+    """
+    This function returns a serials dict with count serial numbers of the same shape as prepare_nornir_data()
+    of nornir_maze. Every host is a stack of one to four switches or a single appliance and about one of ten
+    sites. The fleet is the same for the same count and seed.
+    """
+    rnd = random.Random(f"{seed}-{count}")
+    serials = {}
+
+    while len(serials) < count:
+        role, stack_sizes, current_version, desired_version = rnd.choice(DEVICE_ROLES)
+        host = f"site{rnd.randrange(max(count // 1000, 10)):04d}-{role}-{len(serials):06d}"
+        for switch_num in range(1, rnd.choice(stack_sizes) + 1):
+            serial = rnd.choice(SERIAL_PREFIXES) + "".join(
+                rnd.choices(string.digits, k=4) + rnd.choices(string.ascii_uppercase + string.digits, k=4)
+            )
+            serials[serial] = {
+                "host": host,
+                "nr_data": {
+                    "switch_num": str(switch_num) if role in ("access", "distribution") else "",
+                    "current_version": current_version,
+                    "desired_version": desired_version,
+                },
+            }
+            if len(serials) == count:
+                break
+
+    return serials
+
+
+def write_static_serials_yaml(serials: dict, file: str) -> None:
+    """
+    This function writes the serials dict as static_serials.yaml file with the same format as the file
+    reports/src/static_serials.yaml. The value of every serial is a list of the hostname, the switch number,
+    the current version and the desired version.
+    """
+    static_serials = {
+        serial: [
+            record["host"],
+            record["nr_data"]["switch_num"],
+            record["nr_data"]["current_version"],
+            record["nr_data"]["desired_version"],
+        ]
+        for serial, record in serials.items()
+    }
+    with open(file, "w", encoding="utf-8") as stream:
+        stream.write("---\n")
+        yaml.safe_dump(static_serials, stream, default_flow_style=None, sort_keys=False, width=200)
+
+
+def write_nornir_inventory(serials: dict, directory: str, snmp_agent: str = None) -> None:
+    """
+    This function writes a Nornir SimpleInventory with the hosts.yaml, groups.yaml and defaults.yaml files of
+    all hosts of the serials dict and the nr_config.yaml file to the directory. The paths of the inventory are
+    relative to the parent directory, which is the working directory of the script. Every host is member of
+    its site and role group and has the desired software version as host data. With the address of an
+    snmp_agent like a local snmpsim every host has this address as hostname and its host name as
+    snmp_community.
+    """
+    hosts, groups = {}, {}
+    for record in serials.values():
+        host = record["host"]
+        if host in hosts:
+            continue
+        index = len(hosts) + 1
+        site, role, _ = host.split("-")
+        groups.update({site: {"data": {"site": site}}, role: {"data": {"role": role}}})
+        hosts[host] = {
+            "hostname": snmp_agent or f"10.{index // 65536 % 256}.{index // 256 % 256}.{index % 256}",
+            "groups": [site, role],
+            "data": {
+                "tags": [role, "benchmark"],
+                "software": {"version": record["nr_data"]["desired_version"]},
+                **({"snmp_community": host} if snmp_agent else {}),
+            },
+        }
+
+    # The API credentials are loaded from environment variables and the files are in the working directory
+    defaults = {
+        "platform": "ios",
+        "data": {
+            "cisco_support_api_creds": {
+                "env_client_key": "CISCO_SUPPORT_API_KEY",
+                "env_client_secret": "CISCO_SUPPORT_API_SECRET",
+            },
+            "cisco_maintenance_report": {
+                "yaml_config": "reports/src/report_config.yaml",
+                "excel_file": "cisco_maintenance_report_YYYY-mm-dd.xlsx",
+                "ibm_tss_file": "ibm_tss_report.xlsx",
+            },
+        },
+    }
+    config = {
+        "inventory": {
+            "plugin": "SimpleInventory",
+            "options": {
+                option: f"{os.path.basename(directory)}/{name}.yaml"
+                for option, name in (
+                    ("host_file", "hosts"),
+                    ("group_file", "groups"),
+                    ("defaults_file", "defaults"),
+                )
+            },
+        },
+        "runner": {"plugin": "threaded", "options": {"num_workers": 100}},
+    }
+    os.makedirs(directory, exist_ok=True)
+    for name, data in (("hosts", hosts), ("groups", groups), ("defaults", defaults), ("nr_config", config)):
+        with open(os.path.join(directory, f"{name}.yaml"), "w", encoding="utf-8") as stream:
+            stream.write("---\n")
+            yaml.safe_dump(data, stream, sort_keys=False)
+
+
+def write_snmprec_files(serials: dict, directory: str) -> None:
+    """
+    This function writes a snmpsim data file <host>.snmprec with the entPhysicalTable of every host of the
+    serials dict to the directory, so that snmpsim serves every host with its host name as SNMP community.
+    The chassis of a host with switch numbers are contained in a switch stack entity.
+    """
+    tables = {}
+    for serial, record in serials.items():
+        tables.setdefault(record["host"], []).append((serial, record["nr_data"]))
+
+    os.makedirs(directory, exist_ok=True)
+    for host, chassis in tables.items():
+        # The switch stack has the index 1 and the chassis the index 1000 * the position in the host
+        rows = {1: {5: (2, ENT_PHYSICAL_CLASS_STACK)}} if chassis[0][1]["switch_num"] else {}
+        for position, (serial, nr_data) in enumerate(chassis, start=1):
+            rows[position * 1000] = {
+                4: (2, 1 if rows.get(1) else 0),
+                5: (2, ENT_PHYSICAL_CLASS_CHASSIS),
+                6: (2, int(nr_data["switch_num"] or -1)),
+                10: (4, nr_data["current_version"]),
+                11: (4, serial),
+            }
+        # The snmprec lines are OID|TAG|VALUE and have to be sorted by the column and the index of the OID
+        lines = []
+        for column in sorted({column for row in rows.values() for column in row}):
+            for index, row in sorted(rows.items()):
+                if column in row:
+                    lines.append(f"{ENT_PHYSICAL_TABLE}.{column}.{index}|{row[column][0]}|{row[column][1]}")
+        with open(os.path.join(directory, f"{host}.snmprec"), "w", encoding="utf-8") as stream:
+            stream.write("\n".join(lines) + "\n")
+
+
+def write_tss_workbook(serials: dict, file: str, seed: int = 0) -> None:
+    """
+    This function writes a synthetic IBM TSS workbook with about nine of ten serials of the serials dict.
+    The workbook is written with pandas and XlsxWriter, which are dependencies of nornir_maze.
+    """
+    # Import pandas only when a workbook is written, as the fleet generators are used without pandas
+    import pandas as pd  # pylint: disable=import-outside-toplevel
+
+    rnd = random.Random(f"{seed}-tss")
+    rows = [
+        (
+            serial,
+            rnd.choice(("Active", "Active", "Active", "Expired")),
+            f"TSS{rnd.randrange(100000, 1000000)}",
+            rnd.choice(("24x7x4", "8x5xNBD")),
+        )
+        for serial in serials
+        if rnd.random() < 0.9
+    ]
+    pd.DataFrame(rows, columns=TSS_COLUMNS).to_excel(file, index=False, engine="xlsxwriter")
+
+
+def write_fleet(count: int, directory: str, seed: int = 0, tss: bool = True, snmprec: bool = False) -> tuple:
+    """
+    This function generates the fleet with count serials and writes the static_serials.yaml file, the Nornir
+    inventory and optional the IBM TSS workbook and the snmpsim data files to the directory. The function
+    returns a tuple of the serials dict and a dict with the paths of the written files.
+    """
+    serials = generate_serials(count=count, seed=seed)
+    paths = {
+        "static_serials": os.path.join(directory, "static_serials.yaml"),
+        "inventory": os.path.join(directory, "inventory"),
+        "snmprec": os.path.join(directory, "snmprec") if snmprec else None,
+        "tss": os.path.join(directory, "ibm_tss_report.xlsx") if tss else None,
+    }
+
+    os.makedirs(directory, exist_ok=True)
+    write_static_serials_yaml(serials=serials, file=paths["static_serials"])
+    # The Nornir hosts of a fleet with snmpsim data files use a local snmpsim with the host name as community
+    write_nornir_inventory(
+        serials=serials, directory=paths["inventory"], snmp_agent="127.0.0.1" if snmprec else None
+    )
+    if snmprec:
+        write_snmprec_files(serials=serials, directory=paths["snmprec"])
+    if tss:
+        write_tss_workbook(serials=serials, file=paths["tss"], seed=seed)
+
+    return serials, paths
@@ -0,0 +1,326 @@
+"""
+This module runs the benchmark suite of the nr_cisco_maintenance.py script with synthetic fleets. For every
+scale a fleet is generated and the script runs as subprocess in the fleet directory against the local mock
+Cisco support API server until the Excel report is written. The script reads the generated static_serials.yaml
+file or with --nornir the generated Nornir inventory, whose hosts are served by a local snmpsim SNMP
+simulator. The wall time, the CPU time, the peak RSS, the throughput and the phase durations of every run are
+written as JSON results, which can be compared with the results of a baseline run to catch regressions.
+
+The benchmark suite is started from the repository root with: python -m benchmarks.run_fleet --scales 1000
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import shlex
+import shutil
+import socket
+import argparse
+import platform
+import subprocess
+from maint_check.mock_api import start_mock_api_server
+from benchmarks.fleet import FLEET_SCALES, write_fleet
+
+
+__author__ = "Willi Kubny"
+__maintainer__ = "Willi Kubny"
+__license__ = "MIT"
+__email__ = "willi.kubny@kyndryl.com"
+__status__ = "Production"
+
+
+# Metric lines of the Prometheus textfile of a benchmark run
+METRIC_LINE_RE = re.compile(r"^nr_cisco_maintenance_(\w+?)(?:\{(.*)\})? (\S+)$")
+# The repository root with the nr_cisco_maintenance.py script and the reports directory
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Seconds to wait for the snmpsim SNMP simulator to index the data files and to listen
+SNMPSIM_STARTUP_TIMEOUT = 120
+
+
+#### Functions ###############################################################################################
+
+
+def init_args() -> argparse.Namespace:
+    """
+    This function initialize all arguments of the benchmark suite and returns the argparse namespace.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark nr_cisco_maintenance.py with synthetic fleets")
+    parser.add_argument(
+        "--scales",
+        type=int,
+        nargs="+",
+        default=list(FLEET_SCALES),
+        help=f"number of serials of each fleet (default: {' '.join(str(scale) for scale in FLEET_SCALES)})",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="seed of the synthetic fleets (default: 0)")
+    parser.add_argument("--workers", type=int, default=8, help="value of --api_workers (default: 8)")
+    parser.add_argument("--latency", type=float, default=0.0, help="mean latency of the mock API in seconds")
+    parser.add_argument("--no_tss", action="store_true", help="run without the IBM TSS workbook")
+    parser.add_argument(
+        "--nornir",
+        action="store_true",
+        help="collect the serials of the fleet inventory with --nornir_snmp instead of the static serials",
+    )
+    parser.add_argument(
+        "--snmpsim",
+        type=str,
+        default="snmpsim-command-responder",
+        help="command of the snmpsim SNMP simulator (default: snmpsim-command-responder)",
+    )
+    parser.add_argument(
+        "--work_dir",
+        type=str,
+        default=".cache/benchmarks",
+        help="directory of the generated fleets and reports (default: .cache/benchmarks)",
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=f"benchmarks/results/fleet_{time.strftime('%Y-%m-%d_%H-%M-%S')}.json",
+        help="JSON results file (default: benchmarks/results/fleet_<date>.json)",
+    )
+    parser.add_argument("--baseline", type=str, default=None, help="JSON results file to compare with")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="relative slowdown against the baseline which is a regression (default: 0.2)",
+    )
+    parser.add_argument(
+        "script_args",
+        nargs=argparse.REMAINDER,
+        help="additional arguments for nr_cisco_maintenance.py after --, e.g. -- --api_prune_fields",
+    )
+
+    return parser.parse_args()
+
+
+def parse_metrics_textfile(file: str) -> dict:
+    """
+    This function returns a dict with the phase durations in seconds, the number of API requests by endpoint
+    and status and the API response bytes by endpoint of the Prometheus textfile of a benchmark run.
+    """
+    metrics = {"phases": {}, "api_requests": {}, "api_response_bytes": {}}
+    if not os.path.exists(file):
+        return metrics
+
+    with open(file, encoding="utf-8") as stream:
+        for line in stream:
+            match = METRIC_LINE_RE.match(line.strip())
+            if not match:
+                continue
+            name, value = match.group(1), float(match.group(3))
+            labels = dict(re.findall(r'(\w+)="([^"]*)"', match.group(2) or ""))
+            if name == "phase_duration_seconds":
+                metrics["phases"][labels["phase"]] = round(value, 3)
+            elif name == "api_requests_total":
+                metrics["api_requests"][f"{labels['endpoint']}_{labels['status']}"] = int(value)
+            elif name == "api_response_bytes_total":
+                metrics["api_response_bytes"][labels["endpoint"]] = int(value)
+
+    return metrics
+
+
+def run_benchmark(args: argparse.Namespace, scale: int, base_url: str) -> dict:
+    """
+    This function generates the fleet of the scale, runs the nr_cisco_maintenance.py script as subprocess
+    and returns the results of the run. The fleet directory is the working directory of the script with a
+    copy of the reports directory, so the script reads the generated static_serials.yaml file in the static
+    mode and the generated Nornir inventory with the --nornir argument like in a real run.
+    """
+    fleet_dir = os.path.abspath(os.path.join(args.work_dir, f"fleet_{scale}"))
+    shutil.rmtree(fleet_dir, ignore_errors=True)
+    _, paths = write_fleet(
+        count=scale, directory=fleet_dir, seed=args.seed, tss=not args.no_tss, snmprec=args.nornir
+    )
+    # The static serials, the report config and the report template are read from the reports directory
+    shutil.copytree(
+        os.path.join(REPO_DIR, "reports"),
+        os.path.join(fleet_dir, "reports"),
+        ignore=shutil.ignore_patterns("cisco_maintenance_report_*"),
+    )
+    shutil.copyfile(paths["static_serials"], os.path.join(fleet_dir, "reports", "src", "static_serials.yaml"))
+
+    metrics_file = os.path.join(fleet_dir, "metrics.prom")
+    command = [
+        sys.executable,
+        os.path.join(REPO_DIR, "nr_cisco_maintenance.py"),
+        "--report",
+        "--api_base_url",
+        base_url,
+        "--api_workers",
+        str(args.workers),
+        "--metrics_textfile",
+        metrics_file,
+    ]
+    command += ["--tss", paths["tss"]] if paths["tss"] else []
+
+    print(f"BENCHMARK fleet with {scale} serials")
+    snmpsim = None
+    if args.nornir:
+        # The Nornir hosts are served by snmpsim with the host name as SNMP community
+        snmpsim, port = start_snmpsim(
+            command=args.snmpsim, data_dir=paths["snmprec"], log_file=os.path.join(fleet_dir, "snmpsim.log")
+        )
+        command += ["--nornir", "--nornir_snmp", "--snmp_port", str(port)]
+    else:
+        command += ["--excel", "cisco_maintenance_report_YYYY-mm-dd.xlsx"]
+        command += ["--api_key", "benchmark", "--api_secret", "benchmark"]
+    command += [arg for arg in args.script_args if arg != "--"]
+
+    try:
+        result = run_script(
+            command=command,
+            log_file=os.path.join(fleet_dir, "output.log"),
+            cwd=fleet_dir,
+            env={**os.environ, "CISCO_SUPPORT_API_KEY": "benchmark", "CISCO_SUPPORT_API_SECRET": "benchmark"},
+        )
+    finally:
+        if snmpsim:
+            snmpsim.terminate()
+            snmpsim.wait()
+    result = {"serials": scale, **result}
+    result["serials_per_second"] = round(scale / result["wall_seconds"], 1)
+    result.update(parse_metrics_textfile(file=metrics_file))
+    print(
+        f"BENCHMARK fleet with {scale} serials: {result['wall_seconds']}s wall, {result['cpu_seconds']}s "
+        f"CPU, {result['peak_rss_mib']} MiB peak RSS, {result['serials_per_second']} serials/s "
+        f"(exit code {result['returncode']})"
+    )
+
+    return result
+
+
+def start_snmpsim(command: str, data_dir: str, log_file: str) -> tuple:
+    """
+    This function starts the snmpsim SNMP simulator command as subprocess with the snmprec data files of the
+    data_dir on a free local UDP port and returns a tuple of the process and the port as soon as the simulator
+    listens. As snmpsim refuses to run as root, it switches to the user nobody when started by root.
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    command = shlex.split(command) + [
+        f"--data-dir={data_dir}",
+        f"--agent-udpv4-endpoint=127.0.0.1:{port}",
+        "--log-level=error",
+    ]
+    if os.geteuid() == 0:
+        command += ["--process-user=nobody", "--process-group=nogroup"]
+    with open(log_file, "w", encoding="utf-8") as log:
+        # pylint: disable-next=consider-using-with
+        process = subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT)  # nosec
+
+    # The simulator indexes all data files first and listens on the port afterwards
+    started = time.monotonic()
+    while not _udp_port_in_use(port=port):
+        if process.poll() is not None or time.monotonic() - started > SNMPSIM_STARTUP_TIMEOUT:
+            process.kill()
+            raise RuntimeError(f"snmpsim failed to start, see {log_file}")
+        time.sleep(0.2)
+
+    return process, port
+
+
+def _udp_port_in_use(port: int) -> bool:
+    # The port is in use if it can't be bound by another socket
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        try:
+            sock.bind(("127.0.0.1", port))
+        except OSError:
+            return True
+
+    return False
+
+
+def run_script(command: list, log_file: str, cwd: str = None, env: dict = None) -> dict:
+    """
+    This function runs the command as subprocess in the cwd directory with the env environment variables and
+    the output to the log_file and returns a dict with the exit code, the wall time, the CPU time and the peak
+    RSS of the subprocess. The resource usage is taken from os.wait4() of the subprocess.
+    """
+    started = time.perf_counter()
+    with open(log_file, "w", encoding="utf-8") as log:
+        # pylint: disable-next=consider-using-with
+        process = subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT, cwd=cwd, env=env)  # nosec
+        _, status, rusage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+
+    return {
+        "returncode": process.returncode,
+        "wall_seconds": round(time.perf_counter() - started, 3),
+        "cpu_seconds": round(rusage.ru_utime + rusage.ru_stime, 3),
+        # The ru_maxrss is in bytes on macOS and in kilobytes on all other platforms
+        "peak_rss_mib": round(rusage.ru_maxrss / (1048576 if sys.platform == "darwin" else 1024), 1),
+    }
+
+
+def compare_with_baseline(results: dict, baseline_file: str, threshold: float) -> list:
+    """
+    This function compares the wall time and the phase durations of every scale with the baseline results
+    and returns a list of all regressions which are slower than the baseline by more than the threshold.
+    """
+    with open(baseline_file, encoding="utf-8") as stream:
+        baseline = {run["serials"]: run for run in json.load(stream)["runs"]}
+
+    regressions = []
+    for run in results["runs"]:
+        base = baseline.get(run["serials"])
+        if not base:
+            continue
+        timings = {"wall": (run["wall_seconds"], base["wall_seconds"])}
+        timings.update(
+            {
+                phase: (seconds, base["phases"][phase])
+                for phase, seconds in run["phases"].items()
+                if phase in base.get("phases", {})
+            }
+        )
+        for name, (seconds, base_seconds) in timings.items():
+            ratio = seconds / base_seconds if base_seconds else 1.0
+            print(f"BENCHMARK {run['serials']} serials {name}: {base_seconds}s -> {seconds}s ({ratio:.2f}x)")
+            # Very short timings are too noisy to detect a regression
+            if ratio > 1 + threshold and seconds - base_seconds > 0.5:
+                regressions.append(f"{run['serials']} serials {name}: {ratio:.2f}x slower")
+
+    return regressions
+
+
+def main() -> None:
+    """
+    Main function is executed when the module is directly executed.
+    """
+    args = init_args()
+
+    # The mock Cisco support API server runs in a daemon thread of the benchmark process on a free port
+    server = start_mock_api_server(host="127.0.0.1", port=0, latency=args.latency)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    results = {
+        "started": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "workers": args.workers,
+        "latency": args.latency,
+        "runs": [run_benchmark(args=args, scale=scale, base_url=base_url) for scale in args.scales],
+    }
+    server.shutdown()
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as stream:
+        json.dump(results, stream, indent=2)
+    print(f"BENCHMARK results written to {args.output}")
+
+    # Exit with an error if a run failed or is slower than the baseline
+    failed = [run["serials"] for run in results["runs"] if run["returncode"] != 0]
+    regressions = compare_with_baseline(results, args.baseline, args.threshold) if args.baseline else []
+    for text in [f"{serials} serials: script failed" for serials in failed] + regressions:
+        print(f"BENCHMARK regression {text}")
+    sys.exit(1 if failed or regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+"""
+The maint_check package contains the helper modules of the nr_cisco_maintenance.py script to orchestrate the
+Cisco support API calls and the data gathering of the nornir_maze package.
+"""
@@ -0,0 +1,53 @@
+"""
+This module contains the functions to save and load a compressed archive of the Cisco support API data. The
+archive contains the serials dict before the API stages and the deltas of every serial for each API stage,
+which is all data the API stages have added to the serials dict.
+"""
+
+import os
+import gzip
+import json
+
+
+__author__ = "Willi Kubny"
+__maintainer__ = "Willi Kubny"
+__license__ = "MIT"
+__email__ = "willi.kubny@kyndryl.com"
+__status__ = "Production"
+
+
+# Version of the archive format
+ARCHIVE_VERSION = 1
+
+
+#### Functions ###############################################################################################
+
+
+def save_api_archive(file: str, serials: dict, stage_deltas: dict) -> None:
+    """
+    This function saves the serials dict and the stage deltas as gzip compressed JSON file. The file is
+    written to a temporary file first and replaced afterwards, so an existing archive is never left
+    incomplete.
+    """
+    if os.path.dirname(file):
+        os.makedirs(os.path.dirname(file), exist_ok=True)
+
+    data = {"version": ARCHIVE_VERSION, "serials": serials, "stage_deltas": stage_deltas}
+
+    with gzip.open(f"{file}.tmp", "wt", encoding="utf-8") as archive:
+        json.dump(data, archive, separators=(",", ":"), default=str)
+    os.replace(f"{file}.tmp", file)
+
+
+def load_api_archive(file: str) -> tuple:
+    """
+    This function loads an archive of the save_api_archive() function and returns a tuple of the serials dict
+    and the stage deltas. A ValueError is raised if the archive version is not supported.
+    """
+    with gzip.open(file, "rt", encoding="utf-8") as archive:
+        data = json.load(archive)
+
+    if data.get("version") != ARCHIVE_VERSION:
+        raise ValueError(f"Unsupported archive version {data.get('version')} of {file}")
+
+    return data["serials"], data["stage_deltas"]
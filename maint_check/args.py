@@ -0,0 +1,272 @@
+"""
+This module contains the additional ArgParse arguments of the nr_cisco_maintenance.py script. These arguments
+are parsed before the nornir_maze ArgParse arguments and are removed from sys.argv afterwards.
+"""
+
+import sys
+import argparse
+
+
+__author__ = "Willi Kubny"
+__maintainer__ = "Willi Kubny"
+__license__ = "MIT"
+__email__ = "willi.kubny@kyndryl.com"
+__status__ = "Production"
+
+
+#### Functions ###############################################################################################
+
+
+def init_args_for_maint_check() -> argparse.Namespace:
+    """
+    This function initialize all arguments which are needed for the Cisco support API orchestration. The
+    arguments are parsed with parse_known_args() and all known arguments are removed from sys.argv, so that
+    the init_args_for_cisco_maintenance() function of nornir_maze can parse the remaining arguments as before.
+    The function returns the argparse namespace of the parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+        description="Cisco support API orchestration arguments",
+        add_help=False,
+        allow_abbrev=False,
+    )
+
+    # Add all Cisco support API orchestration arguments
+    parser.add_argument(
+        "--api_workers",
+        type=int,
+        default=1,
+        help="number of concurrent Cisco support API chunk requests (default: 1 = sequential)",
+    )
+
+    parser.add_argument(
+        "--api_cache",
+        nargs="?",
+        const=".cache/cisco_support_api.sqlite",
+        default=False,
+        metavar="FILE",
+        help="use a persistent Cisco support API response cache (default: .cache/cisco_support_api.sqlite)",
+    )
+
+    parser.add_argument(
+        "--api_config",
+        nargs="?",
+        const="reports/src/api_config.yaml",
+        default=False,
+        metavar="FILE",
+        help="load the Cisco support API settings from a YAML file (default: reports/src/api_config.yaml)",
+    )
+
+    parser.add_argument(
+        "--api_token_cache",
+        nargs="?",
+        const=".cache/cisco_support_api_token.json",
+        default=False,
+        metavar="FILE",
+        help="reuse the OAuth2 access token across runs (default: .cache/cisco_support_api_token.json)",
+    )
+
+    parser.add_argument(
+        "--api_base_url",
+        type=str,
+        default=None,
+        metavar="URL",
+        help="send the Cisco support API requests to this base URL, e.g. the maint_check.mock_api server",
+    )
+
+    parser.add_argument(
+        "--api_prune_fields",
+        action="store_true",
+        help="skip the Cisco support API stages and fields without report columns to reduce the memory usage",
+    )
+    parser.add_argument(
+        "--api_tune_chunks",
+        action="store_true",
+        help="tune the chunk size of each Cisco support API by the latency (requires --api_workers > 1)",
+    )
+    parser.add_argument(
+        "--api_hedge",
+        nargs="?",
+        type=float,
+        const=95.0,
+        default=False,
+        metavar="PERCENTILE",
+        help="resend slow API chunk requests after this latency percentile (default: 95, --api_workers > 1)",
+    )
+    parser.add_argument(
+        "--nornir_workers",
+        type=int,
+        default=None,
+        metavar="WORKERS",
+        help="collect the serials of this number of Nornir hosts in parallel and stream their results",
+    )
+    parser.add_argument(
+        "--nornir_timeout",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="give up a Nornir host after this number of seconds of collection (requires --nornir_workers)",
+    )
+    parser.add_argument(
+        "--nornir_snapshot",
+        nargs="?",
+        const=".cache/nornir_inventory.snapshot",
+        default=False,
+        metavar="FILE",
+        help="load the Nornir inventory from a snapshot (default: .cache/nornir_inventory.snapshot)",
+    )
+    parser.add_argument(
+        "--nornir_fact_cache",
+        nargs="?",
+        const=".cache/nornir_facts.sqlite",
+        default=False,
+        metavar="FILE",
+        help="collect only Nornir hosts without valid cached serials (default: .cache/nornir_facts.sqlite)",
+    )
+    parser.add_argument(
+        "--nornir_fact_ttl",
+        type=float,
+        default=604800,
+        metavar="SECONDS",
+        help="collect a Nornir host of the fact cache again after this number of seconds (default: 604800)",
+    )
+    parser.add_argument(
+        "--nornir_snmp",
+        action="store_true",
+        help="collect the serials with SNMP ENTITY-MIB walks (default: --nornir_workers 50)",
+    )
+    parser.add_argument(
+        "--snmp_community",
+        type=str,
+        default="public",
+        metavar="COMMUNITY",
+        help="SNMP community if not set as snmp_community in the Nornir inventory (default: public)",
+    )
+    parser.add_argument(
+        "--snmp_port",
+        type=int,
+        default=161,
+        metavar="PORT",
+        help="SNMP port if not set as snmp_port in the Nornir inventory, e.g. of a simulator (default: 161)",
+    )
+    parser.add_argument(
+        "--snmp_timeout",
+        type=float,
+        default=2.0,
+        metavar="SECONDS",
+        help="timeout of every SNMP request with one retry (default: 2.0)",
+    )
+    parser.add_argument(
+        "--nornir_stream",
+        action="store_true",
+        help="request the Cisco support API while the Nornir hosts are collected (requires --nornir_workers)",
+    )
+    parser.add_argument(
+        "--metrics_textfile",
+        type=str,
+        default=None,
+        metavar="FILE",
+        help="write the run metrics as Prometheus textfile, e.g. for the node_exporter textfile collector",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="print the wall time, CPU time and peak RSS of every script section at the exit of the script",
+    )
+    parser.add_argument(
+        "--profile_dir",
+        type=str,
+        default=None,
+        metavar="DIR",
+        help="write the cProfile statistics of every script section to this directory (implies --profile)",
+    )
+    parser.add_argument(
+        "--api_checkpoint",
+        nargs="?",
+        const=".cache/api_checkpoint.jsonl.gz",
+        default=False,
+        metavar="FILE",
+        help="write a checkpoint of the Cisco support API stages (default: .cache/api_checkpoint.jsonl.gz)",
+    )
+    parser.add_argument(
+        "--api_checkpoint_chunks",
+        type=int,
+        default=20,
+        metavar="N",
+        help="append the completed chunks to the checkpoint after every N chunks (default: 20)",
+    )
+    parser.add_argument(
+        "--api_resume",
+        action="store_true",
+        help="resume the Cisco support API stages from the last completed chunk of the checkpoint",
+    )
+
+    # The record and the replay arguments are mutually exclusive
+    archive = parser.add_mutually_exclusive_group()
+    archive.add_argument(
+        "--api_record",
+        type=str,
+        default=None,
+        metavar="FILE",
+        help="save all Cisco support API data of the run to a compressed archive file",
+    )
+    archive.add_argument(
+        "--api_replay",
+        type=str,
+        default=None,
+        metavar="FILE",
+        help="replay the Cisco support API data of an archive file without any API call",
+    )
+
+    # Print the help of these arguments in addition to the nornir_maze help
+    if "-h" in sys.argv or "--help" in sys.argv:
+        parser.print_help()
+        print()
+
+    args, remaining_argv = parser.parse_known_args()
+
+    # Verify the argument values
+    if args.api_workers < 1:
+        parser.error("argument --api_workers: must be 1 or greater")
+    if args.api_checkpoint_chunks < 1:
+        parser.error("argument --api_checkpoint_chunks: must be 1 or greater")
+    if args.api_tune_chunks and args.api_workers <= 1:
+        parser.error("argument --api_tune_chunks: requires --api_workers greater than 1")
+    if args.api_hedge is not False and not 0 < args.api_hedge <= 100:
+        parser.error("argument --api_hedge: must be a percentile between 0 and 100")
+    if args.api_hedge is not False and args.api_workers <= 1:
+        parser.error("argument --api_hedge: requires --api_workers greater than 1")
+    _verify_nornir_args(parser=parser, args=args)
+
+    # The cProfile statistics are written by the section profiler
+    if args.profile_dir:
+        args.profile = True
+
+    # Resuming a run needs the checkpoint and uses the default checkpoint file if not specified
+    if args.api_resume and not args.api_checkpoint:
+        args.api_checkpoint = ".cache/api_checkpoint.jsonl.gz"
+
+    # Remove the parsed arguments from sys.argv for the nornir_maze ArgParse arguments
+    sys.argv = sys.argv[:1] + remaining_argv
+
+    return args
+
+
+def _verify_nornir_args(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    # Verify the values of the Nornir collection arguments and exit with the parser error otherwise
+
+    # The SNMP collection runs per host on the thread pool of the parallel Nornir collection
+    if args.nornir_snmp and not args.nornir_workers:
+        args.nornir_workers = 50
+    if args.nornir_workers is not None and args.nornir_workers < 1:
+        parser.error("argument --nornir_workers: must be 1 or greater")
+    if args.nornir_timeout is not None and not args.nornir_workers:
+        parser.error("argument --nornir_timeout: requires --nornir_workers")
+    if args.nornir_fact_ttl < 0:
+        parser.error("argument --nornir_fact_ttl: must be 0 or greater")
+    if args.nornir_stream and not args.nornir_workers:
+        parser.error("argument --nornir_stream: requires --nornir_workers")
+    # The checkpoint and the replay archive need the whole serials dict before the API stages start
+    if args.nornir_stream and (args.api_checkpoint or args.api_resume or args.api_replay):
+        parser.error(
+            "argument --nornir_stream: not allowed with --api_checkpoint, --api_resume or --api_replay"
+        )
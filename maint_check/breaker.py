@@ -0,0 +1,137 @@
+"""
+This module contains the circuit breaker of the Cisco support API endpoints. After repeated failures of an
+endpoint the circuit breaker opens and the serials of the endpoint are marked as unavailable instead of
+calling the endpoint again, so that the report can be generated with the data of the other endpoints. After a
+cool-down a single probe request is sent to the endpoint, which closes the circuit breaker again on success.
+"""
+
+import time
+import threading
+
+
+__author__ = "Willi Kubny"
+__maintainer__ = "Willi Kubny"
+__license__ = "MIT"
+__email__ = "willi.kubny@kyndryl.com"
+__status__ = "Production"
+
+
+# Seconds to wait before the first retry of a failed chunk request, which doubles with every failure
+DEFAULT_BREAKER_BACKOFF = 1.0
+# Maximum seconds to wait before the retry of a failed chunk request
+MAX_BREAKER_BACKOFF = 30.0
+# Default seconds an open circuit breaker waits before a single probe request is sent to the endpoint
+DEFAULT_BREAKER_COOLDOWN = 60.0
+# Value of the report columns of an API stage which could not be requested
+UNAVAILABLE = "unavailable"
+
+
+#### Classes #################################################################################################
+
+
+class CircuitBreaker:
+    """
+    The CircuitBreaker is shared by all worker threads of the API stages. Every endpoint counts its
+    consecutive failed chunk requests and a successful request resets the count. As soon as an endpoint has
+    failures consecutive failed requests, the circuit breaker of the endpoint opens. After cooldown seconds
+    the circuit breaker is half-open and lets a single probe request pass. A successful probe closes the
+    circuit breaker and a failed probe opens it for another cooldown. A failed chunk is retried after an
+    exponential backoff, so a short outage of an endpoint does not use up all failures within a few seconds.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(
+        self,
+        failures: int,
+        backoff: float = DEFAULT_BREAKER_BACKOFF,
+        cooldown: float = DEFAULT_BREAKER_COOLDOWN,
+    ) -> None:
+        self.failures = max(int(failures), 1)
+        self.backoff = max(float(backoff), 0.0)
+        self.cooldown = max(float(cooldown), 0.0)
+        self._lock = threading.Lock()
+        self._consecutive = {}
+        # The monotonic time the circuit breaker of an endpoint opened and the endpoints with a probe request
+        self._opened_at = {}
+        self._probing = set()
+        # The total number of failed requests of every endpoint
+        self.failed = {}
+        # The last error of every endpoint with an open circuit breaker
+        self.opened = {}
+
+    def allow(self, endpoint: str) -> bool:
+        """
+        Returns True if the circuit breaker of the endpoint is closed and the endpoint can be requested. An
+        open circuit breaker returns True only once after the cooldown for the probe request of the endpoint.
+        """
+        with self._lock:
+            if endpoint not in self.opened:
+                return True
+            if endpoint in self._probing or time.monotonic() - self._opened_at[endpoint] < self.cooldown:
+                return False
+            self._probing.add(endpoint)
+            return True
+
+    def success(self, endpoint: str) -> None:
+        """
+        Resets the consecutive failures of the endpoint after a successful request and closes the circuit
+        breaker after a successful probe request.
+        """
+        with self._lock:
+            self._consecutive[endpoint] = 0
+            self._probing.discard(endpoint)
+            self.opened.pop(endpoint, None)
+
+    def failure(self, endpoint: str, error: BaseException) -> None:
+        """
+        Counts a failed request of the endpoint and opens the circuit breaker after too many failures or
+        after a failed probe request.
+        """
+        with self._lock:
+            self.failed[endpoint] = self.failed.get(endpoint, 0) + 1
+            self._consecutive[endpoint] = self._consecutive.get(endpoint, 0) + 1
+            if endpoint in self._probing or (
+                self._consecutive[endpoint] >= self.failures and endpoint not in self.opened
+            ):
+                self._probing.discard(endpoint)
+                self._opened_at[endpoint] = time.monotonic()
+                self.opened[endpoint] = error
+
+    def wait(self, endpoint: str) -> None:
+        """
+        Blocks for the backoff time of the consecutive failures of the endpoint before a failed chunk request
+        is retried. The backoff doubles with every failure up to MAX_BREAKER_BACKOFF seconds and is skipped
+        if the circuit breaker of the endpoint is open.
+        """
+        with self._lock:
+            if endpoint in self.opened:
+                return
+            consecutive = self._consecutive.get(endpoint, 0)
+
+        if consecutive:
+            time.sleep(min(self.backoff * 2 ** (consecutive - 1), MAX_BREAKER_BACKOFF))
+
+
+#### Functions ###############################################################################################
+
+
+def mark_unavailable_columns(df, stages: tuple, unavailable: dict, serial_column: str = "sr_no"):
+    """
+    This function sets all report columns of the pandas dataframe df to unavailable, which could not be
+    requested from the API stages for the serial of the row. A column which is provided by more than one
+    stage is only marked if no stage provided the column for the serial. The updated df is returned.
+    """
+    if not any(unavailable.values()) or serial_column not in df.columns:
+        return df
+
+    columns = {column for stage in stages for column in stage.columns if column in df.columns}
+    for column in columns:
+        # The serials which none of the stages of the column could be requested for
+        serials = set.intersection(
+            *(set(unavailable.get(stage.name, ())) for stage in stages if column in stage.columns)
+        )
+        if serials:
+            df.loc[df[serial_column].isin(serials), column] = UNAVAILABLE
+
+    return df
@@ -0,0 +1,115 @@
+"""
+This module contains the persistent response cache of the Cisco support API stages. The deltas of the API
+stages are stored in a SQLite database on the local disk with a TTL per stage and a size-bounded LRU eviction.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+
+
+__author__ = "Willi Kubny"
+__maintainer__ = "Willi Kubny"
+__license__ = "MIT"
+__email__ = "willi.kubny@kyndryl.com"
+__status__ = "Production"
+
+
+# Default TTL in seconds for each API stage. The EOX and suggested release data barely change
+DEFAULT_CACHE_TTL = {
+    "sni_owner_coverage": 86400,
+    "sni_coverage_summary": 86400,
+    "eox": 604800,
+    "ss_suggested_release": 604800,
+}
+# Default maximum number of cache entries before the least recently used entries are evicted
+DEFAULT_CACHE_MAX_ENTRIES = 250000
+
+
+#### Classes #################################################################################################
+
+
+class ApiResponseCache:
+    """
+    The ApiResponseCache stores the delta of an API stage for a key like the serial number or the PID. The
+    cache is thread-safe and can be shared by all worker threads of the API stages.
+    """
+
+    def __init__(self, file: str, ttl: dict = None, max_entries: int = DEFAULT_CACHE_MAX_ENTRIES) -> None:
+        if os.path.dirname(file):
+            os.makedirs(os.path.dirname(file), exist_ok=True)
+
+        self.ttl = {**DEFAULT_CACHE_TTL, **(ttl or {})}
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(file, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS cache "
+            "(endpoint TEXT, key TEXT, stored REAL, accessed REAL, data TEXT, PRIMARY KEY (endpoint, key))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)")
+
+    def get_many(self, endpoint: str, keys: dict) -> dict:
+        """
+        Returns a dict with the cached data of all serials in the keys dict (serial -> cache key) which have
+        an entry not older than the TTL of the endpoint. The access time of these entries is updated.
+        """
+        result = {}
+        now = time.time()
+        min_stored = now - self.ttl.get(endpoint, 0)
+
+        with self._lock:
+            for serial, key in keys.items():
+                if key is None:
+                    continue
+                row = self._db.execute(
+                    "SELECT data FROM cache WHERE endpoint = ? AND key = ? AND stored >= ?",
+                    (endpoint, key, min_stored),
+                ).fetchone()
+                if row:
+                    result[serial] = json.loads(row[0])
+                    self._db.execute(
+                        "UPDATE cache SET accessed = ? WHERE endpoint = ? AND key = ?", (now, endpoint, key)
+                    )
+            self._db.commit()
+            self.hits += len(result)
+            self.misses += len(keys) - len(result)
+
+        return result
+
+    def set_many(self, endpoint: str, keys: dict, data: dict) -> None:
+        """
+        Stores the data of all serials in the keys dict (serial -> cache key). Empty data and data which is
+        not JSON serializable is not stored. Afterwards the least recently used entries above max_entries are
+        evicted.
+        """
+        now = time.time()
+        rows = []
+        for serial, key in keys.items():
+            if key is None or not data.get(serial):
+                continue
+            try:
+                rows.append((endpoint, key, now, now, json.dumps(data[serial])))
+            except (TypeError, ValueError):
+                continue
+
+        with self._lock:
+            self._db.executemany("INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?)", rows)
+            count = self._db.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+            if count > self.max_entries:
+                self._db.execute(
+                    "DELETE FROM cache WHERE rowid IN (SELECT rowid FROM cache ORDER BY accessed LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+            self._db.commit()
+
+    def close(self) -> None:
+        """
+        Closes the SQLite database connection.
+        """
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,96 @@
+"""
+This module contains the checkpoint of the Cisco support API stages. The checkpoint is a gzip compressed JSON
+lines journal. The first line contains the serials dict and every further line contains the deltas of a
+completed chunk of an API stage. New lines are appended as new gzip member, so a checkpoint is never rewritten
+and a crash can only lose the lines which have not been flushed yet.
+"""
+
+import os
+import gzip
+import json
+import zlib
+
+
+__author__ = "Willi Kubny"
+__maintainer__ = "Willi Kubny"
+__license__ = "MIT"
+__email__ = "willi.kubny@kyndryl.com"
+__status__ = "Production"
+
+
+#### Classes #################################################################################################
+
+
+class ApiCheckpoint:
+    """
+    The ApiCheckpoint buffers the deltas of the completed chunks and appends them to the checkpoint file after
+    every chunks completed chunks or when flush() is called, e.g. after an API stage is completed.
+    """
+
+    def __init__(self, file: str, chunks: int = 20) -> None:
+        self.file = file
+        self.chunks = chunks
+        self._lines = []
+
+    def start(self, serials: dict) -> None:
+        """
+        Creates a new checkpoint file with the serials dict as first line.
+        """
+        if os.path.dirname(self.file):
+            os.makedirs(os.path.dirname(self.file), exist_ok=True)
+
+        with gzip.open(self.file, "wt", encoding="utf-8") as journal:
+            journal.write(json.dumps({"serials": serials}, separators=(",", ":"), default=str) + "\n")
+
+    def add(self, stage_name: str, deltas: dict) -> None:
+        """
+        Buffers the deltas of a completed chunk of the API stage and flushes the buffer every chunks chunks.
+        """
+        self._lines.append(
+            json.dumps({"stage": stage_name, "deltas": deltas}, separators=(",", ":"), default=str)
+        )
+        if len(self._lines) >= self.chunks:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Appends all buffered deltas as new gzip member to the checkpoint file.
+        """
+        if not self._lines:
+            return
+
+        with gzip.open(self.file, "at", encoding="utf-8") as journal:
+            journal.write("\n".join(self._lines) + "\n")
+        self._lines = []
+
+    def remove(self) -> None:
+        """
+        Removes the checkpoint file after the API stages are completed.
+        """
+        self._lines = []
+        if os.path.exists(self.file):
+            os.remove(self.file)
+
+
+#### Functions ###############################################################################################
+
+
+def load_api_checkpoint(file: str) -> tuple:
+    """
+    This function loads the checkpoint file and returns a tuple of the serials dict and the stage deltas of
+    all completed chunks. An incomplete last gzip member of a crashed run is ignored.
+    """
+    serials, stage_deltas = {}, {}
+
+    with gzip.open(file, "rt", encoding="utf-8") as journal:
+        try:
+            for line in journal:
+                entry = json.loads(line)
+                if "serials" in entry:
+                    serials = entry["serials"]
+                else:
+                    stage_deltas.setdefault(entry["stage"], {}).update(entry["deltas"])
+        except (EOFError, OSError, zlib.error, ValueError):
+            pass
+
+    return serials, stage_deltas
@@ -0,0 +1,270 @@
+"""
+This module contains the parallel and streaming serial collection of the Nornir hosts. The
+prepare_nornir_data() function of nornir_maze runs per host on a thread pool and the serials of every host are
+yielded as soon as the host is completed, while slow hosts are still running. A host which runs longer than
+the timeout is given up and reported together with the failed and the slowest hosts. The hosts are collected
+by daemon threads, so a timed out host which is still connected doesn't block the exit of the script. With a
+DeviceFactCache the serials of all hosts with valid cached facts are yielded without a connection to the host.
+Another collector function with the signature of prepare_nornir_data() like prepare_snmp_data() can be used
+instead.
+"""
+
+import time
+import queue
+import threading
+from functools import partial
+from typing import Callable, Iterator, NamedTuple
+from nornir.core import Nornir
+from nornir_maze.cisco_support.utils import prepare_nornir_data
+from maint_check.facts import DeviceFactCache
+
+
+__author__ = "Willi Kubny"
+__maintainer__ = "Willi Kubny"
+__license__ = "MIT"
+__email__ = "willi.kubny@kyndryl.com"
+__status__ = "Production"
+
+
+#### Classes #################################################################################################
+
+
+class HostSerials(NamedTuple):
+    """
+    The serials of one Nornir host with the collection time in seconds and the status of the collection,
+    which is ok, cached, failed or timeout. The serials of a failed or timed out host are empty.
+    """
+
+    host: str
+    serials: dict
+    seconds: float
+    status: str
+
+
+class NornirSerialStream:
+    """
+    The NornirSerialStream is an iterable of the serials dict of every Nornir host in the order of completion,
+    which is consumed by the ApiStageScheduler to start the Cisco support API stages while slow hosts are
+    still collected. The HostSerials of all hosts are recorded during the iteration and the serials dict in
+    the order of the Nornir inventory is returned by serials() after the end of the iteration.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        nr_obj: Nornir,
+        workers: int = 10,
+        timeout: float = None,
+        verbose: bool = False,
+        *,
+        facts: DeviceFactCache = None,
+        collector: Callable = prepare_nornir_data,
+    ) -> None:
+        self.nr_obj = nr_obj
+        self.workers = workers
+        self.timeout = timeout
+        self.verbose = verbose
+        self.facts = facts
+        self.collector = collector
+        # The HostSerials by host of all completed, failed and timed out hosts
+        self._results = {}
+
+    def __iter__(self) -> Iterator[dict]:
+        for result in iter_nornir_serials(
+            self.nr_obj, self.workers, self.timeout, self.verbose, facts=self.facts, collector=self.collector
+        ):
+            self._results[result.host] = result
+            if result.serials:
+                yield result.serials
+
+    @property
+    def results(self) -> list:
+        """
+        Returns a list of the HostSerials of all hosts sorted by the collection time with the slowest first.
+        """
+        return sorted(self._results.values(), key=lambda result: result.seconds, reverse=True)
+
+    def serials(self) -> dict:
+        """
+        Returns the serials dict of all collected hosts in the order of the Nornir inventory.
+        """
+        return _inventory_ordered_serials(nr_obj=self.nr_obj, results=self._results)
+
+
+#### Functions ###############################################################################################
+
+
+def iter_nornir_serials(  # pylint: disable=too-many-arguments
+    nr_obj: Nornir,
+    workers: int = 10,
+    timeout: float = None,
+    verbose: bool = False,
+    *,
+    facts: DeviceFactCache = None,
+    collector: Callable = prepare_nornir_data,
+) -> Iterator[HostSerials]:
+    """
+    This function runs the collector prepare_nornir_data() for every host of the nr_obj with workers threads
+    and yields the HostSerials of every host in the order of completion. The timeout in seconds starts when
+    the collection of a host starts. A timed out host is yielded with the status timeout and its thread is
+    left running, as a running thread can't be stopped, and a new thread takes over the remaining hosts. The
+    threads are daemon threads, because the Python interpreter joins the threads of a ThreadPoolExecutor at
+    the exit and would wait for every timed out host. With facts the hosts with valid cached facts are yielded
+    first with the status cached and the serials of all other completed hosts are stored in the fact cache.
+    """
+    # The start time of every host is set by the worker thread of the host
+    started = {}
+
+    # The hosts with valid cached facts are not collected again
+    cached = _cached_host_serials(nr_obj=nr_obj, facts=facts) if facts else {}
+    yield from (
+        HostSerials(host=host, serials=serials, seconds=0.0, status="cached")
+        for host, serials in cached.items()
+    )
+
+    # The worker threads take the hosts from the tasks queue and put the HostSerials to the results queue
+    pending = {host for host in nr_obj.inventory.hosts if host not in cached}
+    tasks, results = queue.SimpleQueue(), queue.SimpleQueue()
+    for host in (host for host in nr_obj.inventory.hosts if host in pending):
+        tasks.put(host)
+    worker = partial(
+        _collect_worker,
+        nr_obj,
+        tasks,
+        results,
+        started=started,
+        collector=collector,
+        verbose=verbose,
+        facts=facts,
+    )
+    for _ in range(min(workers, len(pending))):
+        threading.Thread(target=worker, name="nornir-collect", daemon=True).start()
+
+    try:
+        while pending:
+            # Wake up at least every second or every quarter of the timeout to check all running hosts
+            try:
+                result = results.get(timeout=min(timeout / 4, 1.0) if timeout else None)
+                # A timed out host which completes later has been yielded already
+                if result.host in pending:
+                    pending.discard(result.host)
+                    yield result
+            except queue.Empty:
+                pass
+            if not timeout:
+                continue
+            now = time.monotonic()
+            for host in [host for host in pending if now - started.get(host, now) > timeout]:
+                pending.discard(host)
+                # A new worker thread replaces the thread which is blocked by the timed out host
+                threading.Thread(target=worker, name="nornir-collect", daemon=True).start()
+                yield HostSerials(host=host, serials={}, seconds=now - started[host], status="timeout")
+    finally:
+        # Remove all hosts which are not started yet, so the worker threads stop after their current host
+        while not tasks.empty():
+            tasks.get_nowait()
+
+
+def collect_nornir_serials(  # pylint: disable=too-many-arguments
+    nr_obj: Nornir,
+    workers: int = 10,
+    timeout: float = None,
+    verbose: bool = False,
+    *,
+    facts: DeviceFactCache = None,
+    collector: Callable = prepare_nornir_data,
+) -> tuple:
+    """
+    This function collects the serials of all hosts of the nr_obj with iter_nornir_serials() and returns a
+    tuple of the serials dict in the order of the Nornir inventory and a list of the HostSerials of all
+    hosts sorted by the collection time with the slowest host first.
+    """
+    stream = NornirSerialStream(nr_obj, workers, timeout, verbose, facts=facts, collector=collector)
+    for _ in stream:
+        pass
+
+    return stream.serials(), stream.results
+
+
+def prepare_cached_nornir_data(nr_obj: Nornir, facts: DeviceFactCache, verbose: bool = False) -> dict:
+    """
+    This function runs prepare_nornir_data() once for all hosts of the nr_obj without valid cached facts and
+    stores the collected serials per host in the fact cache. The function returns the serials dict of the
+    cached and the collected hosts in the order of the Nornir inventory.
+    """
+    cached = _cached_host_serials(nr_obj=nr_obj, facts=facts)
+
+    # Collect all hosts without valid cached facts at once and group the serials by host
+    stale_nr_obj = nr_obj.filter(filter_func=lambda host: host.name not in cached)
+    collected = {}
+    if stale_nr_obj.inventory.hosts:
+        for serial, record in prepare_nornir_data(nr_obj=stale_nr_obj, verbose=verbose).items():
+            collected.setdefault(record.get("host"), {})[serial] = record
+    for host, host_serials in collected.items():
+        if host in nr_obj.inventory.hosts:
+            facts.set(host=nr_obj.inventory.hosts[host], serials=host_serials)
+
+    serials = {}
+    for host in nr_obj.inventory.hosts:
+        serials.update(cached.get(host) or collected.get(host, {}))
+
+    return serials
+
+
+def _collect_worker(  # pylint: disable=too-many-arguments
+    nr_obj: Nornir,
+    tasks: queue.SimpleQueue,
+    results: queue.SimpleQueue,
+    *,
+    started: dict,
+    collector: Callable,
+    verbose: bool,
+    facts: DeviceFactCache,
+) -> None:
+    # Collect the hosts of the tasks queue until the queue is empty
+    while True:
+        try:
+            host = tasks.get_nowait()
+        except queue.Empty:
+            return
+        result = HostSerials(host=host, serials={}, seconds=0.0, status="failed")
+        try:
+            host_serials = _collect_host(
+                nr_obj, host, started, collector=collector, verbose=verbose, facts=facts
+            )
+            result = result._replace(serials=host_serials or {}, status="ok")
+        # The nornir_maze functions exit the script with SystemExit on a failed host
+        except (Exception, SystemExit):  # pylint: disable=broad-except
+            pass
+        results.put(result._replace(seconds=time.monotonic() - started.get(host, time.monotonic())))
+
+
+def _collect_host(  # pylint: disable=too-many-arguments
+    nr_obj: Nornir, host: str, started: dict, *, collector: Callable, verbose: bool, facts: DeviceFactCache
+) -> dict:
+    # Collect the serials of the host with the collector and store them in the optional fact cache
+    started[host] = time.monotonic()
+    host_serials = collector(nr_obj=nr_obj.filter(name=host), verbose=verbose)
+    if facts:
+        facts.set(host=nr_obj.inventory.hosts[host], serials=host_serials)
+
+    return host_serials
+
+
+def _cached_host_serials(nr_obj: Nornir, facts: DeviceFactCache) -> dict:
+    # The cached serials dict by host of all hosts with valid cached facts
+    cached = {}
+    for host, host_obj in nr_obj.inventory.hosts.items():
+        host_serials = facts.get(host=host_obj)
+        if host_serials is not None:
+            cached[host] = host_serials
+
+    return cached
+
+
+def _inventory_ordered_serials(nr_obj: Nornir, results: dict) -> dict:
+    # The serials of all hosts with a result in the order of the Nornir inventory
+    serials = {}
+    for host in (host for host in nr_obj.inventory.hosts if host in results):
+        serials.update(results[host].serials)
+
+    return serials
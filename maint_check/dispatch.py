@@ -0,0 +1,495 @@
+"""
+This module contains functions to dispatch the Cisco support API calls of nornir_maze in chunks of serial
+numbers. The API stages are scheduled by their dependencies on a shared thread pool and the results of all
+stages are merged back into the serials dict in the original serial number order.
+"""
+
+import copy
+import math
+import time
+import queue
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from typing import Iterator
+from maint_check.ratelimit import throttle_retry_after
+from maint_check.records import diff_record, prune_record
+
+
+__author__ = "Willi Kubny"
+__maintainer__ = "Willi Kubny"
+__license__ = "MIT"
+__email__ = "willi.kubny@kyndryl.com"
+__status__ = "Production"
+
+
+#### Classes #################################################################################################
+
+
+class _RequestDeduplicator:
+    """
+    The _RequestDeduplicator makes sure that every request key of a stage like the orderable_pid is sent only
+    once to the API. All other serials with the same request key get the delta of the first serial.
+    """
+
+    def __init__(self) -> None:
+        self.deltas = {}
+        self.waiting = {}
+        self.saved = {}
+
+    def filter(self, stage, chunk: dict) -> tuple:
+        """
+        Returns a tuple of the chunk with all serials which have to be requested and a dict with the deltas of
+        all serials which request key has already been resolved. Serials which request key is already
+        requested are kept as waiting until the request key is resolved.
+        """
+        request, resolved = {}, {}
+        for serial, record in chunk.items():
+            key = (stage.name, stage.request_key(serial, record))
+            if key[1] is None:
+                request[serial] = record
+            elif key in self.deltas:
+                resolved[serial] = self.deltas[key]
+            elif key in self.waiting:
+                self.waiting[key][serial] = record
+            else:
+                self.waiting[key] = {}
+                request[serial] = record
+                continue
+            if key[1] is not None:
+                self.saved[stage.name] = self.saved.get(stage.name, 0) + 1
+
+        return request, resolved
+
+    def resolve(self, stage, chunk: dict, deltas: dict) -> tuple:
+        """
+        Stores the deltas of the requested chunk by their request key and returns a tuple of the records and
+        the deltas of all waiting serials with the same request keys.
+        """
+        records, fanned_deltas = {}, {}
+        for serial, record in chunk.items():
+            key = (stage.name, stage.request_key(serial, record))
+            if key[1] is None:
+                continue
+            self.deltas[key] = deltas[serial]
+            for waiting_serial, waiting_record in self.waiting.pop(key, {}).items():
+                records[waiting_serial] = waiting_record
+                fanned_deltas[waiting_serial] = deltas[serial]
+
+        return records, fanned_deltas
+
+
+class ApiStageScheduler:
+    """
+    The ApiStageScheduler runs all API stages on a thread pool with workers threads. The stages without a
+    dependency are submitted chunk by chunk, while twice as many chunks as workers are in progress. The chunk
+    size of each stage is the chunk_size of the stage or the chunk size of the optional ChunkSizeTuner, which
+    is tuned by the measured latency of the completed chunks. As soon as a chunk of a stage is completed, the
+    same chunk is submitted to all stages which depend on it, together with the delta of the completed chunk.
+    With one worker every stage is called once with the whole serial dict. With a stream of serial dicts like
+    the serials of the Nornir hosts as they are collected, the stages without a dependency are submitted in
+    full chunks of the documented maximum as soon as enough serials are streamed and the rest is submitted at
+    the end of the stream. Each request key of a stage like the orderable_pid is requested only once and the
+    delta is fanned out to all serials with the same request key. The optional ApiResponseCache and
+    AdaptiveRateLimiter are shared by all chunks and the deltas of every completed chunk are added to the
+    optional ApiCheckpoint, which is flushed as well after every completed stage. With the optional
+    HedgePolicy a slow chunk request is sent a second time on a separate thread pool and the first response
+    wins. With the optional CircuitBreaker a failed chunk is retried until the circuit breaker of the endpoint
+    opens and all remaining serials of the endpoint and of the stages which depend on it are kept as
+    unavailable with an empty delta.
+    """
+
+    # pylint: disable=too-many-instance-attributes,too-few-public-methods
+
+    # Maximum number of retries of a chunk which is throttled with HTTP 429
+    max_retries = 5
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        stages: tuple,
+        api_creds: tuple,
+        *,
+        workers: int = 1,
+        cache=None,
+        limiter=None,
+        checkpoint=None,
+        fields: set = None,
+        tuner=None,
+        hedger=None,
+        breaker=None,
+    ) -> None:
+        self.stages = stages
+        self.api_creds = api_creds
+        self.workers = workers
+        self.cache = cache
+        self.limiter = limiter
+        self.checkpoint = checkpoint
+        self.fields = fields
+        self.tuner = tuner
+        self.hedger = hedger
+        self.breaker = breaker
+        # The number of requested and deduplicated serials per stage name of the last run
+        self.stats = {}
+        # The serials per stage name of the last run which could not be requested
+        self.unavailable = {}
+        self._executor = None
+        self._hedge_executor = None
+        self._pending = {}
+        self._stage_deltas = {}
+        self._dedup = None
+        self._resumed = {}
+        self._open_chunks = {}
+        self._serial_dict = {}
+        self._serials = []
+        self._cursors = {}
+        self._stream = None
+
+    def run(self, serial_dict: dict, resume_deltas: dict = None, stream: Iterator[dict] = None) -> dict:
+        """
+        Runs all API stages for the serial_dict and returns a dict with the deltas of every serial for each
+        stage name. The serials in the resume_deltas of a checkpoint are not requested again for these stages.
+        The serial dicts of the optional stream are consumed on a separate thread and are added to the
+        serial_dict, which is updated in place.
+        """
+        self._resumed = {stage.name: dict((resume_deltas or {}).get(stage.name, {})) for stage in self.stages}
+        self._stage_deltas = {stage.name: {} for stage in self.stages}
+        self._open_chunks = {stage.name: 0 for stage in self.stages}
+        self._dedup = _RequestDeduplicator()
+        self.unavailable = {stage.name: set() for stage in self.stages}
+        # The position of the next chunk in the serial_dict of each stage without a dependency
+        self._serial_dict = serial_dict
+        self._serials = list(serial_dict)
+        self._cursors = {stage.name: 0 for stage in self.stages if not stage.depends_on}
+        # The serial dicts of the stream are put into a queue by a producer thread until the stream ends
+        self._stream = queue.Queue() if stream is not None else None
+        if self._stream:
+            threading.Thread(target=_produce_stream, args=(stream, self._stream), daemon=True).start()
+
+        # The hedged and the original requests run on their own thread pool while the workers wait for them
+        self._hedge_executor = ThreadPoolExecutor(max_workers=self.workers * 2) if self.hedger else None
+
+        with ThreadPoolExecutor(max_workers=self.workers) as self._executor:
+            # Submit the first chunks of the stages without a dependency
+            self._refill()
+
+            while self._pending or self._stream:
+                # Add the streamed serials and wait for the stream only if no chunk is in progress
+                if self._stream:
+                    self._drain_stream(block=not self._pending)
+                    self._refill()
+                    if not self._pending:
+                        continue
+                # A running stream is checked again after a short time without a completed chunk
+                done, _ = wait(
+                    self._pending, timeout=0.1 if self._stream else None, return_when=FIRST_COMPLETED
+                )
+                for future in done:
+                    self._collect(future=future)
+                # Submit the next chunks of the stages without a dependency with the latest chunk size
+                self._refill()
+
+        # Don't wait for the slower requests of hedged chunks, as their responses are not needed anymore
+        if self._hedge_executor:
+            self._hedge_executor.shutdown(wait=False)
+        if self.checkpoint:
+            self.checkpoint.flush()
+
+        for stage in self.stages:
+            saved = self._dedup.saved.get(stage.name, 0)
+            self.stats[stage.name] = {
+                "requested": len(self._stage_deltas[stage.name]) - saved,
+                "deduplicated": saved,
+            }
+
+        return self._stage_deltas
+
+    def _collect(self, future) -> None:
+        # Fan out the deltas of the completed chunk to the waiting serials of the same request key
+        stage, chunk = self._pending.pop(future)
+        self._open_chunks[stage.name] -= 1
+        deltas = future.result()
+        records, fanned_deltas = self._dedup.resolve(stage=stage, chunk=chunk, deltas=deltas)
+        self._complete(stage=stage, chunk={**chunk, **records}, deltas={**deltas, **fanned_deltas})
+        # Flush the checkpoint as soon as all chunks of the stage are completed
+        if self.checkpoint and self._is_stage_completed(stage=stage):
+            self.checkpoint.flush()
+
+    def _drain_stream(self, block: bool) -> None:
+        # Add all streamed serial dicts of the queue to the serials until the end of the stream is reached
+        while self._stream:
+            try:
+                item = self._stream.get(block=block, timeout=0.1 if block else None)
+            except queue.Empty:
+                return
+            block = False
+            if isinstance(item, BaseException):
+                raise item
+            if item is None:
+                self._stream = None
+                return
+            new_serials = [serial for serial in item if serial not in self._serial_dict]
+            self._serial_dict.update(item)
+            self._serials.extend(new_serials)
+
+    def _refill(self) -> None:
+        # Submit one chunk of each stage without a dependency in turn until enough chunks are in progress
+        while len(self._pending) < self.workers * 2:
+            # While the stream is running only full chunks of the documented maximum are submitted
+            stages = [
+                stage
+                for stage in self.stages
+                if stage.name in self._cursors
+                and len(self._serials) - self._cursors[stage.name]
+                >= (stage.chunk_size if self._stream else 1)
+            ]
+            if not stages:
+                break
+            for stage in stages:
+                start = self._cursors[stage.name]
+                self._cursors[stage.name] += self._chunk_size(stage=stage)
+                chunk = {
+                    serial: self._serial_dict[serial]
+                    for serial in self._serials[start : self._cursors[stage.name]]
+                }
+                self._submit(stage=stage, chunk=chunk)
+
+    def _chunk_size(self, stage) -> int:
+        # With one worker every stage is called once with all serials after the end of the stream
+        if self.workers == 1:
+            return stage.chunk_size if self._stream else max(len(self._serial_dict), 1)
+
+        return self.tuner.size(endpoint=stage.endpoint) if self.tuner else stage.chunk_size
+
+    def _submit(self, stage, chunk: dict) -> None:
+        # Complete the serials of the checkpoint without a request and register their request keys
+        resumed = {sr: self._resumed[stage.name][sr] for sr in chunk if sr in self._resumed[stage.name]}
+        if resumed:
+            resumed_chunk = {serial: record for serial, record in chunk.items() if serial in resumed}
+            chunk = {serial: record for serial, record in chunk.items() if serial not in resumed}
+            records, fanned_deltas = self._dedup.resolve(stage=stage, chunk=resumed_chunk, deltas=resumed)
+            self._complete(stage=stage, chunk=resumed_chunk, deltas=resumed, resumed=True)
+            # The serials which are waiting for the resumed request keys are completed with the fanned deltas
+            if records:
+                self._complete(stage=stage, chunk=records, deltas=fanned_deltas)
+
+        request, resolved = self._dedup.filter(stage=stage, chunk=chunk)
+        if resolved:
+            self._complete(stage=stage, chunk={serial: chunk[serial] for serial in resolved}, deltas=resolved)
+        # Split the chunks of the stages with a dependency into the chunk size of the stage as well
+        size = len(request) if stage.name in self._cursors else self._chunk_size(stage=stage)
+        for sub_request in chunk_serials(serial_dict=request, chunk_size=max(size, 1)):
+            future = self._executor.submit(self._run_chunk, stage, sub_request)
+            self._pending[future] = (stage, sub_request)
+            self._open_chunks[stage.name] += 1
+
+    def _is_stage_completed(self, stage) -> bool:
+        # A stage is completed if all chunks are submitted and completed and the stage it depends on is
+        # completed as well
+        if self._open_chunks[stage.name] or (stage.name in self._cursors and self._stream):
+            return False
+        if self._cursors.get(stage.name, len(self._serials)) < len(self._serials):
+            return False
+        upstream = [dep for dep in self.stages if dep.name == stage.depends_on]
+
+        return all(self._is_stage_completed(stage=dep) for dep in upstream)
+
+    def _run_chunk(self, stage, chunk: dict) -> dict:
+        """
+        Runs the API call function of the stage for one chunk and returns the delta of every serial. The API
+        call function gets a deep copy of the chunk, as concurrent stages must not share mutable records. If a
+        cache is given, the deltas are taken from the cache and only the missing serials are sent to the API.
+        The delta of a serial is None if the serial is unavailable as the circuit breaker of the endpoint is
+        open.
+        """
+        keys = {serial: stage.request_key(serial, record) for serial, record in chunk.items()}
+        deltas = self.cache.get_many(endpoint=stage.name, keys=keys) if self.cache else {}
+        missing = {serial: record for serial, record in chunk.items() if serial not in deltas}
+
+        result = self._guarded_call_api(stage=stage, chunk=missing) if missing else {}
+        if result is None:
+            deltas.update(dict.fromkeys(missing))
+        elif missing:
+            new_deltas = {
+                serial: diff_record(record=result.get(serial, {}), base_record=record)
+                for serial, record in missing.items()
+            }
+            if self.cache:
+                self.cache.set_many(
+                    endpoint=stage.name, keys={serial: keys[serial] for serial in missing}, data=new_deltas
+                )
+            deltas.update(new_deltas)
+
+        # Prune the deltas to the needed fields before they are kept for the rest of the run
+        if self.fields:
+            return {
+                serial: (
+                    prune_record(data=deltas[serial], fields=self.fields)
+                    if deltas[serial]
+                    else deltas[serial]
+                )
+                for serial in chunk
+            }
+
+        return {serial: deltas[serial] for serial in chunk}
+
+    def _guarded_call_api(self, stage, chunk: dict):
+        """
+        Calls the API with the circuit breaker of the endpoint. A failed chunk is retried after the backoff of
+        the circuit breaker as long as the circuit breaker is closed. Returns None if the circuit breaker of
+        the endpoint is open.
+        """
+        if not self.breaker:
+            return self._call_api(stage=stage, chunk=chunk)
+
+        while self.breaker.allow(endpoint=stage.endpoint):
+            try:
+                result = self._call_api(stage=stage, chunk=chunk)
+            # The nornir_maze API call functions exit the script with SystemExit on a failed request
+            except (Exception, SystemExit) as exc:  # pylint: disable=broad-except
+                self.breaker.failure(endpoint=stage.endpoint, error=exc)
+                # Wait with an exponential backoff before the failed chunk is retried
+                self.breaker.wait(endpoint=stage.endpoint)
+                continue
+            self.breaker.success(endpoint=stage.endpoint)
+            return result
+
+        return None
+
+    def _call_api(self, stage, chunk: dict) -> dict:
+        """
+        Calls the API call function of the stage with the rate limiter. A HTTP 429 response throttles the
+        endpoint and the chunk is retried after the Retry-After time. The latency of every successful call is
+        recorded by the optional chunk size tuner.
+        """
+        for attempt in range(self.max_retries + 1):
+            if self.limiter:
+                self.limiter.acquire(endpoint=stage.endpoint, count=math.ceil(len(chunk) / stage.chunk_size))
+            started = time.monotonic()
+            try:
+                result = self._hedged_api_call(stage=stage, chunk=chunk)
+            except Exception as exc:  # pylint: disable=broad-except
+                retry_after = throttle_retry_after(exc)
+                if retry_after is None or not self.limiter or attempt == self.max_retries:
+                    raise
+                self.limiter.throttle(endpoint=stage.endpoint, retry_after=retry_after)
+                continue
+            if self.limiter:
+                self.limiter.success(endpoint=stage.endpoint)
+            if self.tuner:
+                self.tuner.record(
+                    endpoint=stage.endpoint, size=len(chunk), seconds=time.monotonic() - started
+                )
+            return result
+
+        return {}
+
+    def _hedged_api_call(self, stage, chunk: dict) -> dict:
+        """
+        Calls the API call function of the stage. With a hedge policy the chunk is sent a second time if the
+        request takes longer than the hedge threshold of the endpoint and the first successful response wins.
+        """
+        if not self.hedger:
+            return stage.api_call(serial_dict=copy.deepcopy(chunk), api_creds=self.api_creds)
+
+        requests = math.ceil(len(chunk) / stage.chunk_size)
+        threshold = self.hedger.threshold(endpoint=stage.endpoint, requests=requests)
+        futures = [self._submit_api_call(stage=stage, chunk=chunk, requests=requests)]
+        if threshold is not None:
+            done, _ = wait(futures, timeout=threshold)
+            # Hedge the chunk if the request is still running and the hedge ratio of the endpoint allows it
+            if not done and self.hedger.allow(endpoint=stage.endpoint):
+                if self.limiter:
+                    self.limiter.acquire(endpoint=stage.endpoint, count=requests)
+                futures.append(self._submit_api_call(stage=stage, chunk=chunk, requests=requests))
+
+        # Return the first successful response or raise the exception of the original request
+        for future in as_completed(futures):
+            if future.exception():
+                continue
+            if future is not futures[0]:
+                self.hedger.record_win(endpoint=stage.endpoint)
+            return future.result()
+
+        raise futures[0].exception()
+
+    def _submit_api_call(self, stage, chunk: dict, requests: int):
+        # The latency of every request is recorded by the hedge policy as soon as the request is completed
+        started = time.monotonic()
+        future = self._hedge_executor.submit(
+            stage.api_call, serial_dict=copy.deepcopy(chunk), api_creds=self.api_creds
+        )
+        future.add_done_callback(
+            lambda _: self.hedger.record(
+                endpoint=stage.endpoint, seconds=time.monotonic() - started, requests=requests
+            )
+        )
+
+        return future
+
+    def _complete(self, stage, chunk: dict, deltas: dict, resumed: bool = False) -> None:
+        # Unavailable serials get an empty delta and are not added to the checkpoint to request them again
+        unavailable = {serial for serial, delta in deltas.items() if delta is None}
+        if unavailable:
+            self.unavailable[stage.name].update(unavailable)
+            deltas = {serial: delta or {} for serial, delta in deltas.items()}
+        self._stage_deltas[stage.name].update(deltas)
+        if self.checkpoint and not resumed:
+            self.checkpoint.add(
+                stage_name=stage.name,
+                deltas={serial: delta for serial, delta in deltas.items() if serial not in unavailable},
+            )
+        # Submit the completed chunk to all stages which depend on this stage
+        for dependent in (dep for dep in self.stages if dep.depends_on == stage.name):
+            # The unavailable serials are unavailable for the dependent stages as well
+            if unavailable:
+                self._complete(
+                    stage=dependent,
+                    chunk={sr: rec for sr, rec in chunk.items() if sr in unavailable},
+                    deltas=dict.fromkeys(unavailable),
+                )
+            self._submit(
+                stage=dependent,
+                chunk={sr: {**rec, **deltas[sr]} for sr, rec in chunk.items() if sr not in unavailable},
+            )
+
+
+#### Functions ###############################################################################################
+
+
+def chunk_serials(serial_dict: dict, chunk_size: int) -> Iterator[dict]:
+    """
+    This function splits the serial_dict into sub-dicts with a maximum of chunk_size serial numbers each. The
+    order of the serial numbers is kept within and across the chunks.
+    """
+    serials = list(serial_dict)
+
+    for index in range(0, len(serials), chunk_size):
+        yield {serial: serial_dict[serial] for serial in serials[index : index + chunk_size]}
+
+
+def _produce_stream(stream: Iterator[dict], items: queue.Queue) -> None:
+    """
+    This function puts all serial dicts of the stream into the items queue and None at the end of the
+    stream. An exception of the stream is put into the queue to be raised by the consumer.
+    """
+    try:
+        for serial_dict in stream:
+            items.put(serial_dict)
+    except BaseException as exc:  # pylint: disable=broad-except
+        items.put(exc)
+        return
+    items.put(None)
+
+
+def apply_stage_deltas(serial_dict: dict, stages: tuple, stage_deltas: dict) -> dict:
+    """
+    This function applies the deltas of all stages to the serial_dict and returns the updated serials dict.
+    The deltas are applied in the order of the stages, so the result does not depend on the completion order
+    of the chunks.
+    """
+    serials = {}
+    for serial, record in serial_dict.items():
+        serials[serial] = dict(record)
+        for stage in stages:
+            serials[serial].update(stage_deltas.get(stage.name, {}).get(serial, {}))
+
+    return serials
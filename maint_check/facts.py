@@ -0,0 +1,111 @@
+"""
+This module contains the persistent fact cache of the Nornir hosts. The serials of every host with the switch
+numbers and the software versions are stored in a SQLite database on the local disk, so that a host is only
+collected again after the TTL or when its inventory fingerprint changed. The fingerprint is a hash of the
+hostname, the platform, the groups and the inventory data of the host, which includes inventory data like the
+uptime or the last config change timestamp of a CMDB inventory plugin.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from nornir.core.inventory import Host
+
+
+__author__ = "Willi Kubny"
+__maintainer__ = "Willi Kubny"
+__license__ = "MIT"
+__email__ = "willi.kubny@kyndryl.com"
+__status__ = "Production"
+
+
+# Default TTL in seconds of the facts of a Nornir host. The serials and software versions barely change
+DEFAULT_FACT_TTL = 604800
+
+
+#### Classes #################################################################################################
+
+
+class DeviceFactCache:
+    """
+    The DeviceFactCache stores the serials dict of a Nornir host with the fingerprint of the host. The cache
+    is thread-safe and can be used by the worker threads of the Nornir collection.
+    """
+
+    def __init__(self, file: str, ttl: float = DEFAULT_FACT_TTL) -> None:
+        if os.path.dirname(file):
+            os.makedirs(os.path.dirname(file), exist_ok=True)
+
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(file, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS facts "
+            "(host TEXT PRIMARY KEY, stored REAL, fingerprint TEXT, data TEXT)"
+        )
+
+    def get(self, host: Host):
+        """
+        Returns the cached serials dict of the host if the entry is not older than the TTL and the fingerprint
+        of the host is unchanged or None otherwise.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT data FROM facts WHERE host = ? AND stored >= ? AND fingerprint = ?",
+                (host.name, time.time() - self.ttl, host_fingerprint(host=host)),
+            ).fetchone()
+            if row:
+                self.hits += 1
+                return json.loads(row[0])
+            self.misses += 1
+
+        return None
+
+    def set(self, host: Host, serials: dict) -> None:
+        """
+        Stores the serials dict of the host with the fingerprint of the host. An empty serials dict of a
+        failed host and a serials dict which is not JSON serializable is not stored.
+        """
+        if not serials:
+            return
+        try:
+            data = json.dumps(serials)
+        except (TypeError, ValueError):
+            return
+
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO facts VALUES (?, ?, ?, ?)",
+                (host.name, time.time(), host_fingerprint(host=host), data),
+            )
+            self._db.commit()
+
+    def close(self) -> None:
+        """
+        Closes the SQLite database connection.
+        """
+        with self._lock:
+            self._db.close()
+
+
+#### Functions ###############################################################################################
+
+
+def host_fingerprint(host: Host) -> str:
+    """
+    This function returns the SHA-256 hash of the hostname, the platform, the groups with their data and the
+    data of the Nornir host. Values which are not JSON serializable are hashed as string.
+    """
+    inventory = {
+        "hostname": host.hostname,
+        "platform": host.platform,
+        "groups": [[group.name, group.data] for group in host.groups],
+        "data": host.data,
+    }
+
+    return hashlib.sha256(json.dumps(inventory, sort_keys=True, default=str).encode()).hexdigest()
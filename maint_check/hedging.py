@@ -0,0 +1,91 @@
+"""
+This module contains the hedging policy of the Cisco support API stages. A chunk request which takes longer
+than a percentile of the measured latency of its endpoint is sent a second time and the first response wins.
+The number of hedged requests is capped by a ratio of all requests of an endpoint to protect the API quota.
+"""
+
+import math
+import threading
+from collections import deque
+from typing import Optional
+
+
+__author__ = "Willi Kubny"
+__maintainer__ = "Willi Kubny"
+__license__ = "MIT"
+__email__ = "willi.kubny@kyndryl.com"
+__status__ = "Production"
+
+
+# Default percentile of the measured latency after which a chunk request is hedged
+DEFAULT_HEDGE_PERCENTILE = 95.0
+# Default maximum ratio of hedged requests to all requests of an endpoint
+DEFAULT_HEDGE_MAX_RATIO = 0.05
+
+
+#### Classes #################################################################################################
+
+
+class HedgePolicy:
+    """
+    The HedgePolicy is shared by all worker threads of the API stages. The latency per request of the last
+    window requests is kept for each endpoint and the hedge threshold is the percentile of these latencies.
+    No request is hedged until min_samples latencies of the endpoint are measured. A request is hedged only
+    while the hedged requests of the endpoint are below max_ratio of all requests of the endpoint.
+    """
+
+    # Number of measured latencies which are needed before the first request of an endpoint is hedged
+    min_samples = 20
+    # Number of the latest latencies per endpoint which are used for the percentile
+    window = 500
+
+    def __init__(
+        self, percentile: float = DEFAULT_HEDGE_PERCENTILE, max_ratio: float = DEFAULT_HEDGE_MAX_RATIO
+    ) -> None:
+        self.percentile = min(max(float(percentile), 1.0), 100.0)
+        self.max_ratio = max(float(max_ratio), 0.0)
+        self._lock = threading.Lock()
+        self._latencies = {}
+        self._requests = {}
+        # The number of hedged requests and the number of hedged requests which won per endpoint
+        self.hedged = {}
+        self.won = {}
+
+    def threshold(self, endpoint: str, requests: int = 1) -> Optional[float]:
+        """
+        Returns the seconds after which a chunk with the number of requests of the endpoint is hedged or None
+        if not enough latencies of the endpoint are measured yet.
+        """
+        with self._lock:
+            latencies = sorted(self._latencies.get(endpoint, ()))
+        if len(latencies) < self.min_samples:
+            return None
+
+        return latencies[math.ceil(self.percentile / 100 * len(latencies)) - 1] * requests
+
+    def allow(self, endpoint: str) -> bool:
+        """
+        Returns True and counts the hedged request if the endpoint is below the maximum hedge ratio.
+        """
+        with self._lock:
+            hedged = self.hedged.get(endpoint, 0)
+            if hedged + 1 > self.max_ratio * self._requests.get(endpoint, 0):
+                return False
+            self.hedged[endpoint] = hedged + 1
+
+        return True
+
+    def record(self, endpoint: str, seconds: float, requests: int = 1) -> None:
+        """
+        Records the latency in seconds of a chunk with the number of requests of the endpoint.
+        """
+        with self._lock:
+            self._latencies.setdefault(endpoint, deque(maxlen=self.window)).append(seconds / max(requests, 1))
+            self._requests[endpoint] = self._requests.get(endpoint, 0) + 1
+
+    def record_win(self, endpoint: str) -> None:
+        """
+        Counts a hedged request of the endpoint which responded before the original request.
+        """
+        with self._lock:
+            self.won[endpoint] = self.won.get(endpoint, 0) + 1
@@ -0,0 +1,194 @@
+"""
+This module contains the metrics of the script in the Prometheus text exposition format. The metrics are
+collected in the module-level METRICS registry while the script runs and are written as a textfile at the end
+of the run, which is collected by the textfile collector of the Prometheus node_exporter.
+"""
+
+import os
+import re
+import time
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+
+__author__ = "Willi Kubny"
+__maintainer__ = "Willi Kubny"
+__license__ = "MIT"
+__email__ = "willi.kubny@kyndryl.com"
+__status__ = "Production"
+
+
+# Prefix of all metric names
+METRICS_PREFIX = "nr_cisco_maintenance"
+# Upper bounds in seconds of the latency histogram buckets of the Cisco support API requests
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0, float("inf"))
+# The Cisco support API endpoint of a request URL
+ENDPOINT_URL_RE = (
+    ("sni", re.compile(r"/sn2info/")),
+    ("eox", re.compile(r"/supporttools/eox/")),
+    ("ss", re.compile(r"/software/suggestion/")),
+    ("token", re.compile(r"/oauth2/|/as/token")),
+)
+
+
+#### Classes #################################################################################################
+
+
+class MetricsRegistry:
+    """
+    The MetricsRegistry is shared by all threads and keeps counters, gauges and histograms by their metric
+    name and labels. The render() method returns all metrics in the Prometheus text exposition format.
+    """
+
+    def __init__(self, prefix: str = METRICS_PREFIX) -> None:
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        # Metric name -> (type, help text) and metric name -> labels tuple -> value or bucket counts
+        self._meta = {}
+        self._values = {}
+
+    def inc(self, name: str, value: float = 1.0, help_text: str = "", **labels) -> None:
+        """
+        Increases the counter name with the labels by value.
+        """
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._meta.setdefault(name, ("counter", help_text))
+            series = self._values.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def set(self, name: str, value: float, help_text: str = "", **labels) -> None:
+        """
+        Sets the gauge name with the labels to value.
+        """
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._meta.setdefault(name, ("gauge", help_text))
+            self._values.setdefault(name, {})[key] = float(value)
+
+    def observe(self, name: str, value: float, help_text: str = "", **labels) -> None:
+        """
+        Adds value to the histogram name with the labels and the LATENCY_BUCKETS.
+        """
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._meta.setdefault(name, ("histogram", help_text))
+            histogram = self._values.setdefault(name, {}).setdefault(
+                key, {"buckets": [0] * len(LATENCY_BUCKETS), "sum": 0.0, "count": 0}
+            )
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if value <= bound:
+                    histogram["buckets"][index] += 1
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Context manager which sets the duration of the script phase name as gauge.
+        """
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.set(
+                "phase_duration_seconds",
+                time.monotonic() - started,
+                help_text="Duration of the script phase in seconds",
+                phase=name,
+            )
+
+    def observe_request(self, url: str, seconds: float, status: int, size: int) -> None:
+        """
+        Records the count, the latency and the response size of a HTTP request to a Cisco support API.
+        """
+        endpoint = url_endpoint(url=url)
+        self.inc(
+            "api_requests_total",
+            help_text="Cisco support API HTTP requests by endpoint and status code",
+            endpoint=endpoint,
+            status=str(status),
+        )
+        self.observe(
+            "api_request_duration_seconds",
+            seconds,
+            help_text="Cisco support API HTTP request latency in seconds",
+            endpoint=endpoint,
+        )
+        self.inc(
+            "api_response_bytes_total",
+            size,
+            help_text="Cisco support API HTTP response body bytes",
+            endpoint=endpoint,
+        )
+
+    def render(self) -> str:
+        """
+        Returns all metrics in the Prometheus text exposition format.
+        """
+        lines = []
+        with self._lock:
+            for name in sorted(self._values):
+                kind, help_text = self._meta[name]
+                metric = f"{self.prefix}_{name}"
+                lines.append(f"# HELP {metric} {help_text or name}")
+                lines.append(f"# TYPE {metric} {kind}")
+                for key, value in sorted(self._values[name].items()):
+                    if kind != "histogram":
+                        lines.append(f"{metric}{_format_labels(key)} {_format_value(value)}")
+                        continue
+                    for bound, count in zip(LATENCY_BUCKETS, value["buckets"]):
+                        labels = _format_labels(key + (("le", "+Inf" if bound == float("inf") else bound),))
+                        lines.append(f"{metric}_bucket{labels} {count}")
+                    lines.append(f"{metric}_sum{_format_labels(key)} {_format_value(value['sum'])}")
+                    lines.append(f"{metric}_count{_format_labels(key)} {value['count']}")
+
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, file: str) -> None:
+        """
+        Writes all metrics to the textfile. The file is replaced atomically, as the node_exporter could read
+        the file at any time.
+        """
+        self.set("last_run_timestamp_seconds", time.time(), help_text="Unix time of the end of the last run")
+        os.makedirs(os.path.dirname(file) or ".", exist_ok=True)
+        temp_file = f"{file}.{os.getpid()}.tmp"
+        with open(temp_file, "w", encoding="utf-8") as stream:
+            stream.write(self.render())
+        os.replace(temp_file, file)
+
+
+#### Functions ###############################################################################################
+
+
+def url_endpoint(url: str) -> str:
+    """
+    This function returns the name of the Cisco support API endpoint of the request url or other.
+    """
+    return next((name for name, regex in ENDPOINT_URL_RE if regex.search(url)), "other")
+
+
+def _format_labels(key: tuple) -> str:
+    # Label values are escaped as defined by the Prometheus text exposition format
+    if not key:
+        return ""
+    labels = ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in key)
+
+    return "{" + labels + "}"
+
+
+def _escape_label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    # Integral values are written without a decimal point
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+#### Default Registry ########################################################################################
+
+
+# The metrics registry of the script which is shared by all modules
+METRICS = MetricsRegistry()
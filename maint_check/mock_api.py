@@ -0,0 +1,338 @@
+"""
+This module contains a local stand-in server of the Cisco support APIs for offline benchmarking. The server
+answers the OAuth2 token endpoint as well as the SNI, EOX and software suggestion endpoints with the payload
+shapes of the Cisco support APIs. The latency, the error rate and the HTTP 429 rate can be configured. The
+payloads are derived from the requested IDs, so every run with the same serial numbers gets the same data.
+
+The server is started with: python -m maint_check.mock_api --port 8080 --latency 0.2 --rate_429 0.02
+The nr_cisco_maintenance.py script uses the server with the argument --api_base_url http://127.0.0.1:8080
+"""
+
+import re
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from urllib.parse import unquote
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+__author__ = "Willi Kubny"
+__maintainer__ = "Willi Kubny"
+__license__ = "MIT"
+__email__ = "willi.kubny@kyndryl.com"
+__status__ = "Production"
+
+
+# Orderable PIDs with their description and a suggested release for the synthetic payloads
+MOCK_PIDS = (
+    ("C9300-48P-E", "Catalyst 9300 48-port PoE+, Network Essentials", "17.9.4a"),
+    ("C9300-24T-A", "Catalyst 9300 24-port data only, Network Advantage", "17.9.4a"),
+    ("C9200L-24P-4G-E", "Catalyst 9200L 24-port PoE+, 4 x 1G, Network Essentials", "17.9.4a"),
+    ("C9500-40X-A", "Catalyst 9500 40-port 10Gig switch, Advantage", "17.9.4a"),
+    ("WS-C2960X-48FPD-L", "Catalyst 2960-X 48 GigE PoE 740W, 2 x 10G SFP+, LAN Base", "15.2.7E8"),
+    ("WS-C3850-24XS-S", "Cisco Catalyst 3850 24 Port 10G Fiber Switch IP Base", "16.12.9"),
+    ("ISR4331/K9", "Cisco ISR 4331 (3GE,2NIM,1SM,4G FLASH,4G DRAM,IPB)", "17.9.4a"),
+    ("N9K-C93180YC-FX", "Nexus 9300 with 48p 10/25G SFP+ and 6p 100G QSFP28", "10.2(6)"),
+    ("FPR2110-NGFW-K9", "Cisco Firepower 2110 NGFW Appliance, 1U", "7.0.4"),
+    ("AIR-AP2802I-E-K9", "802.11ac W2 AP w/CA; 4x4:3; Int Ant; 2xGbE, E domain", ""),
+)
+# EOX date fields of an EOXRecord
+EOX_DATE_FIELDS = (
+    "EOXExternalAnnouncementDate",
+    "EndOfSaleDate",
+    "EndOfSWMaintenanceReleases",
+    "EndOfRoutineFailureAnalysisDate",
+    "EndOfServiceContractRenewal",
+    "LastDateOfSupport",
+    "EndOfSvcAttachDate",
+    "UpdatedTimeStamp",
+)
+
+
+#### Functions ###############################################################################################
+
+
+def _seed(value: str) -> int:
+    """
+    Returns a stable integer for the value to derive the synthetic payload data.
+    """
+    return int(hashlib.sha256(value.encode()).hexdigest()[:8], 16)
+
+
+def _pid_for_serial(serial: str) -> tuple:
+    """
+    Returns the MOCK_PIDS entry of the serial number.
+    """
+    return MOCK_PIDS[_seed(serial) % len(MOCK_PIDS)]
+
+
+def _date(seed: int, offset_days: int) -> str:
+    """
+    Returns a date string in the format YYYY-MM-DD which is offset_days plus up to two years from today.
+    """
+    return time.strftime("%Y-%m-%d", time.gmtime(time.time() + (offset_days + seed % 730) * 86400))
+
+
+def _pagination(records: int) -> dict:
+    return {"last_index": 1, "page_index": 1, "page_records": records, "total_records": records}
+
+
+def sni_owner_coverage_payload(serials: list) -> dict:
+    """
+    Returns the payload of SNIgetOwnerCoverageStatusBySerialNumbers for the list of serial numbers.
+    """
+    records = []
+    for serial in serials:
+        seed = _seed(serial)
+        records.append(
+            {
+                "sr_no": serial,
+                "sr_no_owner": "YES" if seed % 10 else "NO",
+                "coverage_end_date": _date(seed=seed, offset_days=-180) if seed % 7 else "",
+            }
+        )
+
+    return {"serial_numbers": records}
+
+
+def sni_coverage_summary_payload(serials: list) -> dict:
+    """
+    Returns the payload of SNIgetCoverageSummaryBySerialNumbers for the list of serial numbers.
+    """
+    records = []
+    for serial in serials:
+        seed = _seed(serial)
+        pid, description, _ = _pid_for_serial(serial)
+        records.append(
+            {
+                "sr_no": serial,
+                "is_covered": "YES" if seed % 7 else "NO",
+                "coverage_end_date": _date(seed=seed, offset_days=-180) if seed % 7 else "",
+                "contract_site_customer_name": "MOCK CUSTOMER AG",
+                "contract_site_address1": "Mockstrasse 1",
+                "contract_site_city": "ZUERICH",
+                "contract_site_state_province": "ZH",
+                "contract_site_country": "CH",
+                "covered_product_line_end_date": _date(seed=seed, offset_days=365),
+                "service_contract_number": str(200000000 + seed % 1000),
+                "service_line_descr": "SNTC-8X5XNBD",
+                "warranty_end_date": _date(seed=seed, offset_days=-720),
+                "warranty_type": "WARR-1YR-LTD-HW",
+                "warranty_type_description": "Cisco 1 Year Limited Hardware Warranty",
+                "parent_sr_no": "",
+                "orderable_pid_list": [
+                    {"orderable_pid": pid, "item_description": description, "item_type": "PRODUCT"}
+                ],
+            }
+        )
+
+    return {"pagination_response_record": _pagination(records=len(records)), "serial_numbers": records}
+
+
+def eox_payload(serials: list) -> dict:
+    """
+    Returns the payload of EOXgetBySerialNumbers for the list of serial numbers.
+    """
+    records = []
+    for serial in serials:
+        seed = _seed(serial)
+        pid, description, _ = _pid_for_serial(serial)
+        record = {
+            "EOLProductID": pid,
+            "ProductIDDescription": description,
+            "ProductBulletinNumber": "EOL0000",
+        }
+        for index, field in enumerate(EOX_DATE_FIELDS):
+            record[field] = {
+                "value": _date(seed=seed, offset_days=-1500 + index * 365),
+                "dateFormat": "YYYY-MM-DD",
+            }
+        record["EOXMigrationDetails"] = {
+            "MigrationInformation": f"Migrate {pid}",
+            "MigrationOption": "Enter PID(s)",
+            "MigrationProductId": pid,
+            "MigrationProductName": description,
+            "MigrationStrategy": "",
+            "MigrationProductInfoURL": "",
+        }
+        record["EOXInputType"] = "ShowEOXBySerialNumber"
+        record["EOXInputValue"] = serial
+        records.append(record)
+
+    return {"PaginationResponseRecord": _pagination(records=len(records)), "EOXRecord": records}
+
+
+def ss_suggested_release_payload(pids: list) -> dict:
+    """
+    Returns the payload of getSuggestedReleasesByProductIDs for the list of PIDs.
+    """
+    releases = {pid: release for pid, _, release in MOCK_PIDS}
+    products = []
+    for index, pid in enumerate(pids, start=1):
+        release = releases.get(pid, "")
+        products.append(
+            {
+                "id": index,
+                "product": {"basePID": pid, "mdfId": str(_seed(pid) % 1000000000), "productName": pid},
+                "suggestions": [
+                    {
+                        "id": "1",
+                        "isSuggested": "Y" if release else "N",
+                        "releaseFormat1": release,
+                        "releaseFormat2": release,
+                        "releaseDate": "08-Jun-2023" if release else "",
+                        "majorRelease": release.split(".", maxsplit=1)[0],
+                        "releaseTrain": release.rsplit(".", maxsplit=1)[0],
+                        "errorDetailsResponse": None if release else {"errorCode": "S3_BPID_NOT_FOUND"},
+                    }
+                ],
+            }
+        )
+
+    return {"paginationResponseRecord": _pagination(records=len(products)), "productList": products}
+
+
+#### Classes #################################################################################################
+
+
+class MockCiscoSupportApiHandler(BaseHTTPRequestHandler):
+    """
+    The request handler of the local Cisco support API stand-in server. The class attributes latency, jitter,
+    error_rate and rate_429 are set before the server is started.
+    """
+
+    latency = 0.0
+    jitter = 0.0
+    error_rate = 0.0
+    rate_429 = 0.0
+    _random = random.Random(0)  # nosec B311
+    _lock = threading.Lock()
+
+    # The token paths of the Cisco identity service like /oauth2/default/v1/token and of the Cisco SSO
+    token_route = re.compile(r"(?:/token|/as/token\.oauth2)$")
+    # The routes of the Cisco support API endpoints with the payload function
+    routes = (
+        (
+            re.compile(r"/sn2info/v2/coverage/owner_status/serial_numbers/([^/?]+)"),
+            sni_owner_coverage_payload,
+        ),
+        (re.compile(r"/sn2info/v2/coverage/summary/serial_numbers/([^/?]+)"), sni_coverage_summary_payload),
+        (re.compile(r"/supporttools/eox/rest/5/EOXBySerialNumber/\d+/([^/?]+)"), eox_payload),
+        (
+            re.compile(r"/software/suggestion/v2/suggestions/releases/productIds/([^/?]+)"),
+            ss_suggested_release_payload,
+        ),
+    )
+
+    def do_POST(self) -> None:  # pylint: disable=invalid-name
+        """
+        Answers the OAuth2 client credentials grant flow with an access token.
+        """
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.token_route.search(self.path.split("?")[0]):
+            self._send(
+                status=200, payload={"access_token": "mock", "token_type": "Bearer", "expires_in": 3599}
+            )
+        else:
+            self._send(status=404, payload={"error": "not found"})
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """
+        Answers the Cisco support API endpoints after the configured latency. A request fails with HTTP 429 or
+        HTTP 500 with the configured rates.
+        """
+        with self._lock:
+            delay = max(self._random.gauss(self.latency, self.jitter), 0.0)
+            chance = self._random.random()
+        time.sleep(delay)
+
+        if chance < self.rate_429:
+            self._send(status=429, payload={"error": "Too Many Requests"}, headers={"Retry-After": "1"})
+            return
+        if chance < self.rate_429 + self.error_rate:
+            self._send(status=500, payload={"error": "Internal Server Error"})
+            return
+
+        for route, payload in self.routes:
+            match = route.search(self.path)
+            if match:
+                self._send(status=200, payload=payload(unquote(match.group(1)).split(",")))
+                return
+
+        self._send(status=404, payload={"error": "not found"})
+
+    def log_message(self, format, *args) -> None:  # pylint: disable=redefined-builtin
+        # Don't log every request to stderr
+        pass
+
+    def _send(self, status: int, payload: dict, headers: dict = None) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+#### Functions ###############################################################################################
+
+
+def start_mock_api_server(
+    host: str = "127.0.0.1",
+    port: int = 8080,
+    latency: float = 0.0,
+    error_rate: float = 0.0,
+    rate_429: float = 0.0,
+) -> ThreadingHTTPServer:
+    """
+    This function starts the mock Cisco support API server in a daemon thread and returns the server. The
+    latency is the mean response time in seconds with a jitter of a quarter of the latency.
+    """
+    MockCiscoSupportApiHandler.latency = latency
+    MockCiscoSupportApiHandler.jitter = latency / 4
+    MockCiscoSupportApiHandler.error_rate = error_rate
+    MockCiscoSupportApiHandler.rate_429 = rate_429
+
+    server = ThreadingHTTPServer((host, port), MockCiscoSupportApiHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return server
+
+
+def main() -> None:
+    """
+    Main function is executed when the module is directly executed.
+    """
+    parser = argparse.ArgumentParser(description="Local mock server of the Cisco support APIs")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="listen address (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8080, help="listen port (default: 8080)")
+    parser.add_argument("--latency", type=float, default=0.0, help="mean response time in seconds")
+    parser.add_argument("--error_rate", type=float, default=0.0, help="rate of HTTP 500 responses (0.0-1.0)")
+    parser.add_argument("--rate_429", type=float, default=0.0, help="rate of HTTP 429 responses (0.0-1.0)")
+    args = parser.parse_args()
+
+    server = start_mock_api_server(
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        rate_429=args.rate_429,
+    )
+    print(f"Mock Cisco support API server listening on http://{args.host}:{args.port}")
+
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+This module contains the section profiler of the script. The script is divided into sections by the
+print_task_title() function of nornir_maze and the profiler records the wall time, the CPU time and the peak
+RSS memory of every section. Optionally the cProfile statistics of every section are written to a directory.
+"""
+
+import os
+import re
+import sys
+import time
+import atexit
+import cProfile
+from types import ModuleType
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+__author__ = "Willi Kubny"
+__maintainer__ = "Willi Kubny"
+__license__ = "MIT"
+__email__ = "willi.kubny@kyndryl.com"
+__status__ = "Production"
+
+
+#### Classes #################################################################################################
+
+
+class SectionProfiler:
+    """
+    The SectionProfiler replaces the print_task_title() function of a module with a wrapper which ends the
+    current section and starts a new section with the task title. The peak RSS of a section is read from
+    /proc/self/status and is reset at the start of every section on Linux. On other platforms the peak RSS is
+    the peak of the whole process so far. With a pstats_dir the cProfile statistics of every section are
+    written as pstats file to this directory. cProfile profiles only the main thread, so the time of the
+    API worker threads is part of the wall time of a section, but not of its cProfile statistics.
+    """
+
+    def __init__(self, pstats_dir: str = None) -> None:
+        self.pstats_dir = pstats_dir
+        # A list of dicts with the title, the wall time, the CPU time and the peak RSS of every section
+        self.sections = []
+        self._current = None
+        self._profile = None
+
+    def install(self, module: ModuleType, title: str, name: str = "print_task_title") -> None:
+        """
+        Replaces the function name of the module with a wrapper which starts a new section with every task
+        title, starts the first section with title and prints the summary table at the exit of the script.
+        """
+        print_func = getattr(module, name)
+
+        def print_task_title(task_title: str, *args, **kwargs):
+            self.start(title=task_title)
+            return print_func(task_title, *args, **kwargs)
+
+        setattr(module, name, print_task_title)
+        if self.pstats_dir:
+            os.makedirs(self.pstats_dir, exist_ok=True)
+        self.start(title=title)
+        atexit.register(self.print_summary)
+
+    def start(self, title: str) -> None:
+        """
+        Ends the current section and starts a new section with the title.
+        """
+        self.stop()
+        _reset_peak_rss()
+        self._current = {"title": title, "wall": time.perf_counter(), "cpu": time.process_time()}
+        if self.pstats_dir:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    def stop(self) -> None:
+        """
+        Ends the current section and records its wall time, CPU time and peak RSS.
+        """
+        if not self._current:
+            return
+
+        if self._profile:
+            self._profile.disable()
+            slug = re.sub(r"[^a-z0-9]+", "_", self._current["title"].lower()).strip("_")
+            self._profile.dump_stats(
+                os.path.join(self.pstats_dir, f"{len(self.sections) + 1:02d}_{slug}.pstats")
+            )
+            self._profile = None
+
+        self.sections.append(
+            {
+                "title": self._current["title"],
+                "wall": time.perf_counter() - self._current["wall"],
+                "cpu": time.process_time() - self._current["cpu"],
+                "peak_rss": _peak_rss(),
+            }
+        )
+        self._current = None
+
+    def print_summary(self) -> None:
+        """
+        Ends the current section and prints a table with the wall time, the CPU time and the peak RSS in MiB
+        of every section.
+        """
+        self.stop()
+        width = max([len(section["title"]) for section in self.sections] + [7])
+        print(f"\nPYTHON profile summary\n{'Section':<{width}}  {'Wall s':>9}  {'CPU s':>9}  {'Peak MiB':>9}")
+        for section in self.sections:
+            print(
+                f"{section['title']:<{width}}  {section['wall']:>9.2f}  {section['cpu']:>9.2f}  "
+                f"{section['peak_rss'] / 1048576:>9.1f}"
+            )
+        print(f"{'Total':<{width}}  {sum(section['wall'] for section in self.sections):>9.2f}")
+        if self.pstats_dir:
+            print(f"PYTHON cProfile statistics of every section written to {self.pstats_dir}")
+        sys.stdout.flush()
+
+
+#### Functions ###############################################################################################
+
+
+def _reset_peak_rss() -> None:
+    # Since Linux 4.0 writing 5 to clear_refs resets the peak RSS (VmHWM) of the process
+    try:
+        with open("/proc/self/clear_refs", "w", encoding="utf-8") as stream:
+            stream.write("5")
+    except OSError:
+        pass
+
+
+def _peak_rss() -> int:
+    # The peak RSS in bytes of the section on Linux or of the whole process on other platforms
+    try:
+        with open("/proc/self/status", encoding="utf-8") as stream:
+            for line in stream:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # The ru_maxrss is in bytes on macOS and in kilobytes on all other platforms
+    return peak if sys.platform == "darwin" else peak * 1024
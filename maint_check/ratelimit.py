@@ -0,0 +1,111 @@
+"""
+This module contains the adaptive rate limiter of the Cisco support API stages. Every endpoint has a token
+bucket with its own request budget. The rate of an endpoint is halved when the API responds with HTTP 429 and
+is increased step by step again after successful requests.
+"""
+
+import time
+import threading
+from typing import Optional
+
+
+__author__ = "Willi Kubny"
+__maintainer__ = "Willi Kubny"
+__license__ = "MIT"
+__email__ = "willi.kubny@kyndryl.com"
+__status__ = "Production"
+
+
+# Default budget in requests per second for each Cisco support API endpoint
+DEFAULT_RATE_LIMIT = {"sni": 5.0, "eox": 5.0, "ss": 5.0}
+# Default wait time in seconds after a HTTP 429 response without a Retry-After header
+DEFAULT_RETRY_AFTER = 5.0
+# Message prefix of the requests HTTPError of a HTTP 429 response, e.g. raised by response.raise_for_status()
+THROTTLE_ERROR_PREFIX = "429 Client Error"
+
+
+#### Functions ###############################################################################################
+
+
+def throttle_retry_after(exc: Exception) -> Optional[float]:
+    """
+    This function returns the seconds to wait if the exception is caused by a HTTP 429 Too Many Requests
+    response or None otherwise. The Retry-After header of the response is used if available.
+    """
+    response = getattr(exc, "response", None)
+    # Only an exception without a response like a SystemExit falls back to the HTTPError message prefix
+    if response is not None:
+        throttled = getattr(response, "status_code", None) == 429
+    else:
+        throttled = str(exc).startswith(THROTTLE_ERROR_PREFIX)
+    if not throttled:
+        return None
+
+    return response_retry_after(response=response)
+
+
+def response_retry_after(response) -> float:
+    """
+    This function returns the seconds of the Retry-After header of a HTTP 429 response or the default wait
+    time if the header is missing or no number of seconds.
+    """
+    try:
+        return float((getattr(response, "headers", None) or {}).get("Retry-After", DEFAULT_RETRY_AFTER))
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER
+
+
+#### Classes #################################################################################################
+
+
+class AdaptiveRateLimiter:
+    """
+    The AdaptiveRateLimiter is shared by all worker threads of the API stages. Each endpoint has a token
+    bucket which is refilled with the current rate of the endpoint. A throttled endpoint halves its rate and
+    pauses until the Retry-After time has passed. Every successful request increases the rate by a tenth of
+    the budget until the budget of the endpoint is reached again.
+    """
+
+    def __init__(self, budgets: dict = None, burst: float = 1.0) -> None:
+        self.budgets = {**DEFAULT_RATE_LIMIT, **(budgets or {})}
+        self.rates = dict(self.budgets)
+        self.throttled = {endpoint: 0 for endpoint in self.budgets}
+        self._burst = burst
+        # The bucket of each endpoint is a list of the available tokens and the time of the last refill
+        self._buckets = {
+            endpoint: [rate * burst, time.monotonic()] for endpoint, rate in self.budgets.items()
+        }
+        self._paused_until = {endpoint: 0.0 for endpoint in self.budgets}
+        self._lock = threading.Lock()
+
+    def acquire(self, endpoint: str, count: int = 1) -> None:
+        """
+        Takes count tokens from the bucket of the endpoint and blocks until these tokens are available. A
+        count above the bucket size is allowed and takes the tokens in advance.
+        """
+        with self._lock:
+            now = time.monotonic()
+            rate = self.rates[endpoint]
+            bucket = self._buckets[endpoint]
+            bucket[0] = min(bucket[0] + (now - bucket[1]) * rate, rate * self._burst) - count
+            bucket[1] = now
+            wait = max(-bucket[0] / rate, self._paused_until[endpoint] - now, 0.0)
+
+        time.sleep(wait)
+
+    def success(self, endpoint: str) -> None:
+        """
+        Increases the rate of the endpoint by a tenth of its budget after a successful request.
+        """
+        with self._lock:
+            budget = self.budgets[endpoint]
+            self.rates[endpoint] = min(self.rates[endpoint] + budget / 10, budget)
+
+    def throttle(self, endpoint: str, retry_after: float) -> None:
+        """
+        Halves the rate of the endpoint and pauses all requests to the endpoint for retry_after seconds.
+        """
+        with self._lock:
+            self.throttled[endpoint] += 1
+            self.rates[endpoint] = max(self.rates[endpoint] / 2, self.budgets[endpoint] / 20)
+            self._paused_until[endpoint] = max(self._paused_until[endpoint], time.monotonic() + retry_after)
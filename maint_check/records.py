@@ -0,0 +1,64 @@
+"""
+This module contains the functions to compare, search and prune the serial records of the serials dict and the
+deltas of the Cisco support API stages.
+"""
+
+
+__author__ = "Willi Kubny"
+__maintainer__ = "Willi Kubny"
+__license__ = "MIT"
+__email__ = "willi.kubny@kyndryl.com"
+__status__ = "Production"
+
+
+#### Functions ###############################################################################################
+
+
+def diff_record(record: dict, base_record: dict) -> dict:
+    """
+    This function returns all keys of the record which are new or changed compared to the base_record. This
+    delta is the data an API stage has added to the serial record.
+    """
+    return {
+        key: value for key, value in record.items() if key not in base_record or base_record[key] != value
+    }
+
+
+def find_value(data, key: str):
+    """
+    This function searches the nested dicts and lists of data for the key and returns the value of the first
+    match or None if the key doesn't exist.
+    """
+    if isinstance(data, dict):
+        if key in data:
+            return data[key]
+        data = list(data.values())
+    if isinstance(data, list):
+        for item in data:
+            value = find_value(data=item, key=key)
+            if value is not None:
+                return value
+
+    return None
+
+
+def prune_record(data, fields: set):
+    """
+    This function returns a copy of the nested dicts and lists of data with only the keys in the fields set.
+    The whole value of a key in the fields set is kept. Nested dicts and lists of other keys are pruned in the
+    same way and are removed if they are empty afterwards. All other values are removed.
+    """
+    if isinstance(data, dict):
+        pruned = {}
+        for key, value in data.items():
+            if key in fields:
+                pruned[key] = value
+            elif isinstance(value, (dict, list)):
+                value = prune_record(data=value, fields=fields)
+                if value:
+                    pruned[key] = value
+        return pruned
+    if isinstance(data, list):
+        return [item for item in (prune_record(data=item, fields=fields) for item in data) if item]
+
+    return None
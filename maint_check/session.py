@@ -0,0 +1,197 @@
+"""
+This module contains the shared HTTP session of the Cisco support API requests. The nornir_maze API call
+functions use the module-level functions of requests, which create a new connection for every request. These
+functions are routed through one session with a keep-alive connection pool. Every API call function requests
+its own OAuth2 access token, so the token response is cached by the session and reused by all API calls until
+shortly before the token expires. With a token file the token is reused by the following runs as well, e.g. by
+the runs of a cron job. The nornir_maze API call functions exit the script on a HTTP 429 response,
+so a throttled request is retried by the session with the adaptive rate limiter which is attached to it.
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from maint_check.metrics import METRICS, url_endpoint
+from maint_check.ratelimit import response_retry_after
+
+
+__author__ = "Willi Kubny"
+__maintainer__ = "Willi Kubny"
+__license__ = "MIT"
+__email__ = "willi.kubny@kyndryl.com"
+__status__ = "Production"
+
+
+# The hosts of the Cisco support APIs and the OAuth2 token endpoint which are replaced by the base URL
+CISCO_API_URL_RE = re.compile(r"^https://(?:id|cloudsso|apix|api)\.cisco\.com")
+# The paths of the OAuth2 token endpoint of the Cisco SSO and of the Cisco identity service
+TOKEN_URL_RE = re.compile(r"/oauth2/|/as/token")
+# Seconds before the expiry of an access token in which the token is not reused anymore
+TOKEN_EXPIRY_MARGIN = 60
+# Maximum number of retries of a request which is throttled with HTTP 429
+THROTTLE_RETRIES = 5
+# The adaptive rate limiter which is fed with the HTTP 429 responses of the shared session
+_SESSION_STATE = {"limiter": None}
+
+
+#### Classes #################################################################################################
+
+
+class OAuthTokenCache:  # pylint: disable=too-few-public-methods
+    """
+    The OAuthTokenCache stores the successful responses of the OAuth2 token endpoint by the URL and the
+    credentials of the token request. A cached response is returned until TOKEN_EXPIRY_MARGIN seconds before
+    the expires_in time of the access token. With the optional file the token responses are written to a
+    local JSON file with the permissions 0600, so the following runs reuse a token which is not expired yet.
+    The file contains the access tokens by a hash of the request and no client credentials. The cache is
+    thread-safe and only one token request per credentials is sent at the same time.
+    """
+
+    def __init__(self, file: str = None, margin: float = TOKEN_EXPIRY_MARGIN) -> None:
+        self.file = file
+        self.margin = margin
+        self.hits = 0
+        self._lock = threading.Lock()
+        # The JSON body, the status code and the expiry time by the hash of the token request
+        self._tokens = self._load()
+
+    def request(self, send, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Returns the cached token response of the request or sends the request with the send function and
+        caches the response if it contains an access token with an expires_in time.
+        """
+        key = hashlib.sha256(
+            repr(
+                (url, *(kwargs.get(name) for name in ("params", "data", "json", "auth", "headers")))
+            ).encode()
+        ).hexdigest()
+        with self._lock:
+            token = self._tokens.get(key)
+            if token and time.time() < token["expires"]:
+                self.hits += 1
+                METRICS.inc("api_token_cache_hits_total", help_text="Reused Cisco support API access tokens")
+                return _token_response(url=url, token=token)
+
+            started = time.time()
+            response = send(method=method, url=url, **kwargs)
+            try:
+                expires_in = float(response.json()["expires_in"]) if response.status_code == 200 else 0.0
+            except (ValueError, KeyError, TypeError):
+                expires_in = 0.0
+            if expires_in > self.margin:
+                self._tokens[key] = {"body": response.text, "expires": started + expires_in - self.margin}
+                self._save()
+
+        return response
+
+    def _load(self) -> dict:
+        # Load all tokens of the token file which are not expired yet
+        if not self.file or not os.path.exists(self.file):
+            return {}
+        try:
+            with open(self.file, encoding="utf-8") as stream:
+                tokens = json.load(stream)
+        except (OSError, ValueError):
+            return {}
+
+        return {key: token for key, token in tokens.items() if time.time() < token.get("expires", 0.0)}
+
+    def _save(self) -> None:
+        # Write the tokens to a temporary file with the permissions 0600 first to replace the file atomically
+        if not self.file:
+            return
+        if os.path.dirname(self.file):
+            os.makedirs(os.path.dirname(self.file), exist_ok=True)
+        descriptor = os.open(f"{self.file}.tmp", os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(descriptor, "w", encoding="utf-8") as stream:
+            json.dump(self._tokens, stream)
+        os.replace(f"{self.file}.tmp", self.file)
+
+
+#### Functions ###############################################################################################
+
+
+def attach_rate_limiter(limiter) -> None:
+    """
+    This function attaches the adaptive rate limiter of the API stages to the shared session. A HTTP 429
+    response of an endpoint of the limiter throttles the endpoint and the request is retried after the
+    Retry-After time. With limiter None the HTTP 429 responses are returned to the API call functions.
+    """
+    _SESSION_STATE["limiter"] = limiter
+
+
+def init_shared_session(
+    pool_size: int = 10, base_url: str = None, token_file: str = None
+) -> requests.Session:
+    """
+    This function creates a requests session with a keep-alive connection pool of pool_size connections per
+    host and routes requests.request() and all module-level shortcuts like requests.get() and requests.post()
+    through this session. Reused connections skip the TCP and TLS handshake and all responses are requested
+    gzip compressed. With a base_url like http://127.0.0.1:8080 all requests to the Cisco support APIs are
+    sent to this base URL instead, e.g. to the local mock server of the maint_check.mock_api module. The
+    count, the latency and the response size of every request are recorded in the METRICS registry. The OAuth2
+    token requests are answered by an OAuthTokenCache, so the access token is only requested again shortly
+    before it expires. With a token_file the access token is reused across runs. HTTP 429 responses are
+    retried with the rate limiter of attach_rate_limiter(). The function returns the shared session.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Accept-Encoding"] = "gzip, deflate"
+    tokens = OAuthTokenCache(file=token_file)
+
+    def send(method: str, url: str, **kwargs) -> requests.Response:
+        limiter = _SESSION_STATE["limiter"]
+        endpoint = url_endpoint(url=url)
+        for attempt in range(THROTTLE_RETRIES + 1):
+            started = time.monotonic()
+            response = session.request(method=method, url=url, **kwargs)
+            METRICS.observe_request(
+                url=url,
+                seconds=time.monotonic() - started,
+                status=response.status_code,
+                size=len(response.content),
+            )
+            # Return the response unless it is throttled and the limiter of the endpoint can retry it
+            throttled = response.status_code == 429 and endpoint in getattr(limiter, "budgets", {})
+            if not throttled or attempt == THROTTLE_RETRIES:
+                break
+            # Throttle the endpoint for all worker threads and wait for the Retry-After time
+            limiter.throttle(endpoint=endpoint, retry_after=response_retry_after(response=response))
+            limiter.acquire(endpoint=endpoint)
+
+        return response
+
+    def request(method: str, url: str, **kwargs) -> requests.Response:
+        if base_url:
+            url = CISCO_API_URL_RE.sub(base_url.rstrip("/"), url)
+        # Reuse the access token of an earlier token request with the same credentials
+        if method.upper() == "POST" and TOKEN_URL_RE.search(url):
+            return tokens.request(send, method=method, url=url, **kwargs)
+
+        return send(method=method, url=url, **kwargs)
+
+    # The shortcuts requests.get() and requests.post() call the request() function of the requests.api module
+    requests.api.request = request
+    requests.request = request
+
+    return session
+
+
+def _token_response(url: str, token: dict) -> requests.Response:
+    # Create a new response of the cached token, as a response object must not be shared by threads
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response.encoding = "utf-8"
+    response.headers = CaseInsensitiveDict({"Content-Type": "application/json"})
+    response._content = token["body"].encode()  # pylint: disable=protected-access
+
+    return response
@@ -0,0 +1,118 @@
+"""
+This module contains the compiled snapshot of the Nornir inventory. The SnapshotInventory plugin loads the
+inventory of the source inventory plugin like SimpleInventory once and writes it as pickle file together with
+the SHA-256 hash of the Nornir config file and all inventory files. As long as the hash is unchanged, the
+inventory is loaded from the snapshot and the YAML files are not parsed. The snapshot is written before the
+transform function and the environment variable transformations, so no credentials are stored.
+"""
+
+import os
+import pickle  # nosec
+import hashlib
+import yaml
+from nornir.core.inventory import Inventory
+from nornir.core.plugins.inventory import InventoryPluginRegister
+
+
+__author__ = "Willi Kubny"
+__maintainer__ = "Willi Kubny"
+__license__ = "MIT"
+__email__ = "willi.kubny@kyndryl.com"
+__status__ = "Production"
+
+
+# Name of the registered Nornir inventory plugin
+SNAPSHOT_PLUGIN = "SnapshotInventory"
+
+
+#### Classes #################################################################################################
+
+
+class SnapshotInventory:  # pylint: disable=too-few-public-methods
+    """
+    The SnapshotInventory is a Nornir inventory plugin which returns the inventory of the source plugin with
+    the source options from the snapshot_file. The snapshot is rebuilt with the source plugin when the hash
+    of the config_file and all source options which are files has changed.
+    """
+
+    def __init__(self, snapshot_file: str, config_file: str, plugin: str, options: dict = None) -> None:
+        self.snapshot_file = snapshot_file
+        self.config_file = config_file
+        self.plugin = plugin
+        self.options = options or {}
+
+    def load(self) -> Inventory:
+        """
+        Returns the inventory of the snapshot file or of the source plugin if the snapshot is outdated.
+        """
+        digest = inventory_files_hash(config_file=self.config_file, options=self.options).encode()
+
+        # The first line of the snapshot file is the hash of the inventory files of the snapshot
+        if os.path.exists(self.snapshot_file):
+            with open(self.snapshot_file, "rb") as stream:
+                if stream.readline().rstrip() == digest:
+                    print(f"PYTHON load Nornir inventory snapshot {self.snapshot_file}")
+                    return pickle.load(stream)  # nosec
+
+        inventory = InventoryPluginRegister.get_plugin(self.plugin)(**self.options).load()
+
+        # Write the snapshot to a temporary file first to replace an old snapshot atomically
+        if os.path.dirname(self.snapshot_file):
+            os.makedirs(os.path.dirname(self.snapshot_file), exist_ok=True)
+        with open(f"{self.snapshot_file}.tmp", "wb") as stream:
+            stream.write(digest + b"\n")
+            pickle.dump(inventory, stream, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(f"{self.snapshot_file}.tmp", self.snapshot_file)
+        print(f"PYTHON rebuild Nornir inventory snapshot {self.snapshot_file}")
+
+        return inventory
+
+
+#### Functions ###############################################################################################
+
+
+def inventory_files_hash(config_file: str, options: dict) -> str:
+    """
+    This function returns the SHA-256 hash of the config_file and of all inventory plugin options which are
+    existing files like the host_file, group_file and defaults_file of SimpleInventory. The SimpleInventory
+    default files are hashed if these options are not set.
+    """
+    options = {
+        "host_file": "hosts.yaml",
+        "group_file": "groups.yaml",
+        "defaults_file": "defaults.yaml",
+        **options,
+    }
+    files = [config_file] + [value for _, value in sorted(options.items()) if isinstance(value, str)]
+
+    digest = hashlib.sha256()
+    for file in (file for file in files if os.path.isfile(file)):
+        digest.update(file.encode() + b"\0")
+        with open(file, "rb") as stream:
+            digest.update(stream.read())
+
+    return digest.hexdigest()
+
+
+def snapshot_inventory_config(config_file: str, snapshot_file: str) -> dict:
+    """
+    This function returns the inventory argument of InitNornir() which loads the inventory of the Nornir
+    config_file with the SnapshotInventory plugin from the snapshot_file. The transform function of the
+    config_file is kept, as InitNornir() merges the inventory argument with the config_file.
+    """
+    with open(config_file, encoding="utf-8") as stream:
+        inventory = (yaml.safe_load(stream) or {}).get("inventory", {})
+
+    return {
+        "plugin": SNAPSHOT_PLUGIN,
+        "options": {
+            "snapshot_file": snapshot_file,
+            "config_file": config_file,
+            "plugin": inventory.get("plugin", "SimpleInventory"),
+            "options": inventory.get("options", {}),
+        },
+    }
+
+
+# Register the SnapshotInventory plugin to be used by InitNornir()
+InventoryPluginRegister.register(SNAPSHOT_PLUGIN, SnapshotInventory)
@@ -0,0 +1,212 @@
+"""
+This module contains the SNMP serial collection of the Nornir hosts as alternative to the CLI collection of
+prepare_nornir_data(). The entPhysicalTable of the ENTITY-MIB is walked with GETBULK requests and every
+chassis with a serial number becomes a serial of the same serials dict shape. The SNMP collection needs the
+optional pysnmp package and runs per host on the thread pool of iter_nornir_serials(), while the SNMP requests
+of all hosts are sent concurrently by one SNMP engine on the event loop of the SnmpRunner.
+"""
+
+import asyncio
+import threading
+from nornir.core import Nornir
+
+try:
+    from pysnmp.hlapi.v3arch.asyncio import (
+        CommunityData,
+        ContextData,
+        ObjectIdentity,
+        ObjectType,
+        SnmpEngine,
+        UdpTransportTarget,
+        bulk_walk_cmd,
+    )
+except ImportError:
+    bulk_walk_cmd = None
+
+
+__author__ = "Willi Kubny"
+__maintainer__ = "Willi Kubny"
+__license__ = "MIT"
+__email__ = "willi.kubny@kyndryl.com"
+__status__ = "Production"
+
+
+# The entPhysicalTable columns of the ENTITY-MIB which are walked for every host
+ENT_PHYSICAL_COLUMNS = {
+    "contained_in": "1.3.6.1.2.1.47.1.1.1.1.4",
+    "class": "1.3.6.1.2.1.47.1.1.1.1.5",
+    "parent_rel_pos": "1.3.6.1.2.1.47.1.1.1.1.6",
+    "software_rev": "1.3.6.1.2.1.47.1.1.1.1.10",
+    "serial_num": "1.3.6.1.2.1.47.1.1.1.1.11",
+}
+# The INTEGER columns of the entPhysicalTable which are stored as int and not as pretty printed value
+ENT_PHYSICAL_INTEGER_COLUMNS = ("contained_in", "class", "parent_rel_pos")
+# The entPhysicalClass values of a chassis like a stack member or an appliance and of a switch stack
+ENT_PHYSICAL_CLASS_CHASSIS = 3
+ENT_PHYSICAL_CLASS_STACK = 11
+# Number of table rows which are requested with every GETBULK request
+SNMP_MAX_REPETITIONS = 25
+
+
+#### Classes #################################################################################################
+
+
+class SnmpRunner:  # pylint: disable=too-few-public-methods
+    """
+    The SnmpRunner runs an asyncio event loop in a daemon thread with one SNMP engine which is shared by the
+    walks of all hosts. The first request of an SNMP engine loads the MIB modules, so one shared engine is
+    much faster than an engine per host. The run() method is thread-safe and waits for the result of a walk.
+    """
+
+    def __init__(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name="snmp", daemon=True).start()
+        self.engine = self.run(_create_engine())
+
+    def run(self, coro):
+        """
+        Runs the coroutine on the event loop of the runner and returns its result.
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+
+#### Functions ###############################################################################################
+
+
+def snmp_available() -> bool:
+    """
+    This function returns True if the optional pysnmp package for the SNMP collection is installed.
+    """
+    return bulk_walk_cmd is not None
+
+
+def prepare_snmp_data(  # pylint: disable=too-many-arguments
+    nr_obj: Nornir,
+    verbose: bool = False,
+    *,
+    runner: SnmpRunner = None,
+    community: str = "public",
+    port: int = 161,
+    timeout: float = 2.0,
+    retries: int = 1,
+) -> dict:
+    """
+    This function walks the entPhysicalTable of all hosts of the nr_obj and returns the serials dict with the
+    serial number of every chassis, the switch number of a stack member and the software revision of the
+    chassis as current version. The desired version is taken from the software version of the host data. The
+    SNMP community and port of the host data keys snmp_community and snmp_port overrule the arguments, so a
+    local SNMP simulator can serve every host with its own community. Without a shared runner an own
+    SnmpRunner is started. An SNMP error raises a RuntimeError.
+    """
+    runner = runner or SnmpRunner()
+    serials = {}
+    for name, host in nr_obj.inventory.hosts.items():
+        table = runner.run(
+            _walk_entity_table(
+                engine=runner.engine,
+                address=(host.hostname, int(host.get("snmp_port") or port)),
+                community=host.get("snmp_community") or community,
+                timeout=timeout,
+                retries=retries,
+            )
+        )
+        host_serials = entity_table_to_serials(
+            host=name, table=table, desired_version=(host.get("software") or {}).get("version", "")
+        )
+        if verbose:
+            print(f"PYTHON SNMP {name}: {len(table)} entities, {len(host_serials)} serials")
+        serials.update(host_serials)
+
+    return serials
+
+
+def entity_var_binds_to_table(column_var_binds: dict) -> dict:
+    """
+    This function returns the entPhysicalTable rows (index -> column -> value) of the walked var-binds of
+    every column in the column_var_binds dict. The ENT_PHYSICAL_INTEGER_COLUMNS are stored with the raw int
+    value, as the pretty printed value of a loaded ENTITY-MIB is the name of the value like chassis or stack.
+    All other columns are stored as pretty printed string.
+    """
+    table = {}
+    for column, var_binds in column_var_binds.items():
+        for name, value in var_binds:
+            # The entPhysicalIndex is the last component of the OID
+            table.setdefault(int(name[-1]), {})[column] = (
+                int(value) if column in ENT_PHYSICAL_INTEGER_COLUMNS else value.prettyPrint()
+            )
+
+    return table
+
+
+def entity_table_to_serials(host: str, table: dict, desired_version: str) -> dict:
+    """
+    This function returns the serials dict of the chassis entries of the entPhysicalTable rows in the table
+    dict (index -> column -> value). The switch number is the relative position of a chassis which is
+    contained in a switch stack. A chassis without software revision gets the first software revision of any
+    entity.
+    """
+    chassis = [
+        row
+        for _, row in sorted(table.items())
+        if row.get("class") == ENT_PHYSICAL_CLASS_CHASSIS and row.get("serial_num", "").strip()
+    ]
+    fallback_version = next((row["software_rev"] for row in table.values() if row.get("software_rev")), "")
+
+    serials = {}
+    for row in chassis:
+        parent = table.get(row.get("contained_in", 0), {})
+        serials[row["serial_num"].strip()] = {
+            "host": host,
+            "nr_data": {
+                "switch_num": (
+                    str(row.get("parent_rel_pos", ""))
+                    if parent.get("class") == ENT_PHYSICAL_CLASS_STACK
+                    else ""
+                ),
+                "current_version": row.get("software_rev") or fallback_version,
+                "desired_version": desired_version,
+            },
+        }
+
+    return serials
+
+
+async def _create_engine():
+    # The SNMP engine is created on the event loop of the runner
+    return SnmpEngine()
+
+
+async def _walk_entity_table(engine, address: tuple, community: str, timeout: float, retries: int) -> dict:
+    # Walk all entPhysicalTable columns of the host at the same time
+    target = await UdpTransportTarget.create(address, timeout=timeout, retries=retries)
+    columns = await asyncio.gather(
+        *(
+            _bulk_walk(engine=engine, target=target, community=community, oid=oid)
+            for oid in ENT_PHYSICAL_COLUMNS.values()
+        )
+    )
+
+    # Merge the columns to a dict of the rows by the entPhysicalIndex
+    return entity_var_binds_to_table(column_var_binds=dict(zip(ENT_PHYSICAL_COLUMNS, columns)))
+
+
+async def _bulk_walk(engine, target, community: str, oid: str) -> list:
+    # The raw var-binds of the column, which are converted by entity_var_binds_to_table()
+    values = []
+    async for error_indication, error_status, error_index, var_binds in bulk_walk_cmd(
+        engine,
+        CommunityData(community),
+        target,
+        ContextData(),
+        0,
+        SNMP_MAX_REPETITIONS,
+        ObjectType(ObjectIdentity(oid)),
+        lexicographicMode=False,
+    ):
+        if error_indication or error_status:
+            raise RuntimeError(
+                f"SNMP walk of {oid} failed: {error_indication or error_status} ({error_index})"
+            )
+        values.extend(var_binds)
+
+    return values
@@ -0,0 +1,209 @@
+"""
+This module contains the definition of the Cisco support API stages. Each stage maps a nornir_maze API call
+function and its print function to the stage name, the chunk size, the stage it depends on and the request key
+of a serial record.
+"""
+
+from typing import Callable, NamedTuple, Optional
+from nornir_maze.cisco_support.api_calls import (
+    get_sni_owner_coverage_by_serial_number,
+    get_sni_coverage_summary_by_serial_numbers,
+    get_eox_by_serial_numbers,
+    get_ss_suggested_release_by_pid,
+    print_sni_owner_coverage_by_serial_number,
+    print_sni_coverage_summary_by_serial_numbers,
+    print_eox_by_serial_numbers,
+    print_get_ss_suggested_release_by_pid,
+)
+from maint_check.records import find_value
+
+
+__author__ = "Willi Kubny"
+__maintainer__ = "Willi Kubny"
+__license__ = "MIT"
+__email__ = "willi.kubny@kyndryl.com"
+__status__ = "Production"
+
+
+#### Functions ###############################################################################################
+
+
+def prune_api_stages(stages: tuple, columns: list) -> tuple:
+    """
+    This function returns a tuple of the selected stages and the pruned stages. A stage is selected if one of
+    its columns is in the columns list or if another selected stage depends on it. The order of the stages is
+    kept.
+    """
+    selected = set()
+    # Iterate in reverse order as a stage can only depend on a stage which is defined before
+    for stage in reversed(stages):
+        if set(stage.columns) & set(columns) or any(
+            dep.depends_on == stage.name for dep in stages if dep.name in selected
+        ):
+            selected.add(stage.name)
+
+    return (
+        tuple(stage for stage in stages if stage.name in selected),
+        tuple(stage for stage in stages if stage.name not in selected),
+    )
+
+
+def report_fields(columns: list) -> set:
+    """
+    This function returns the set of all raw API fields which are needed for the report columns, including the
+    source fields of derived columns and the identity fields of the API records.
+    """
+    fields = set(columns) | set(IDENTITY_FIELDS)
+    for column in columns:
+        fields.update(DERIVED_COLUMN_FIELDS.get(column, ()))
+
+    return fields
+
+
+def serial_request_key(serial: str, record: dict) -> str:  # pylint: disable=unused-argument
+    """
+    Returns the serial number as the request key of the serial record.
+    """
+    return serial
+
+
+def orderable_pid_request_key(serial: str, record: dict) -> str:  # pylint: disable=unused-argument
+    """
+    Returns the orderable_pid of the coverage summary data as the request key of the serial record.
+    """
+    return find_value(data=record, key="orderable_pid")
+
+
+#### Classes #################################################################################################
+
+
+class ApiStage(NamedTuple):
+    """
+    A Cisco support API stage. The endpoint is the name of the Cisco support API which budget is shared by all
+    stages of the same endpoint. The chunk_size is the maximum number of serial numbers per API request of the
+    endpoint and depends_on is the name of the stage which data is needed by this stage. The request_key
+    function returns the ID which is sent to the API for a serial record. Serial records with the same request
+    key are requested only once and share the API response cache entry. The columns are the report columns
+    which are created from the data of the stage.
+    """
+
+    name: str
+    title: str
+    endpoint: str
+    api_call: Callable
+    print_call: Callable
+    chunk_size: int
+    columns: tuple = ()
+    depends_on: Optional[str] = None
+    request_key: Callable = serial_request_key
+
+
+#### Constants ###############################################################################################
+
+
+# The order of the stages is the order the results are merged and printed
+API_STAGES = (
+    ApiStage(
+        name="sni_owner_coverage",
+        title="SNIgetOwnerCoverageStatusBySerialNumbers",
+        endpoint="sni",
+        api_call=get_sni_owner_coverage_by_serial_number,
+        print_call=print_sni_owner_coverage_by_serial_number,
+        chunk_size=75,
+        columns=("sr_no_owner", "coverage_end_date", "coverage_action_needed", "api_action_needed"),
+    ),
+    ApiStage(
+        name="sni_coverage_summary",
+        title="SNIgetCoverageSummaryBySerialNumbers",
+        endpoint="sni",
+        api_call=get_sni_coverage_summary_by_serial_numbers,
+        print_call=print_sni_coverage_summary_by_serial_numbers,
+        chunk_size=75,
+        columns=(
+            "is_covered",
+            "coverage_end_date",
+            "coverage_action_needed",
+            "contract_site_customer_name",
+            "contract_site_address1",
+            "contract_site_city",
+            "contract_site_state_province",
+            "contract_site_country",
+            "covered_product_line_end_date",
+            "service_contract_number",
+            "service_line_descr",
+            "warranty_end_date",
+            "warranty_type",
+            "warranty_type_description",
+            "item_description",
+            "item_type",
+            "orderable_pid",
+        ),
+    ),
+    ApiStage(
+        name="eox",
+        title="EOXgetBySerialNumbers",
+        endpoint="eox",
+        api_call=get_eox_by_serial_numbers,
+        print_call=print_eox_by_serial_numbers,
+        chunk_size=20,
+        columns=(
+            "ErrorDescription",
+            "ErrorDataType",
+            "ErrorDataValue",
+            "EOXExternalAnnouncementDate",
+            "EndOfSaleDate",
+            "EndOfSWMaintenanceReleases",
+            "EndOfRoutineFailureAnalysisDate",
+            "EndOfServiceContractRenewal",
+            "LastDateOfSupport",
+            "EndOfSvcAttachDate",
+            "UpdatedTimeStamp",
+            "MigrationInformation",
+            "MigrationProductId",
+            "MigrationProductName",
+            "MigrationStrategy",
+            "MigrationProductInfoURL",
+        ),
+    ),
+    # The suggested release needs the orderable_pid of the coverage summary
+    ApiStage(
+        name="ss_suggested_release",
+        title="getSuggestedReleasesByProductIDs",
+        endpoint="ss",
+        api_call=get_ss_suggested_release_by_pid,
+        print_call=print_get_ss_suggested_release_by_pid,
+        chunk_size=10,
+        columns=("recommended_version",),
+        depends_on="sni_coverage_summary",
+        request_key=orderable_pid_request_key,
+    ),
+)
+# Raw API fields which are needed for the report columns that are derived from the API data by nornir_maze
+DERIVED_COLUMN_FIELDS = {
+    "recommended_version": (
+        "basePID",
+        "isSuggested",
+        "releaseFormat1",
+        "releaseFormat2",
+        "errorDetailsResponse",
+    ),
+    "coverage_action_needed": ("is_covered", "coverage_end_date"),
+    "api_action_needed": ("sr_no_owner",),
+}
+# Raw API fields which are needed by the print functions and the stages to identify the API records
+IDENTITY_FIELDS = (
+    "sr_no",
+    "sr_no_owner",
+    "is_covered",
+    "coverage_end_date",
+    "orderable_pid",
+    "item_description",
+    "EOLProductID",
+    "ProductIDDescription",
+    "EOXInputValue",
+    "EOXInputType",
+    "ErrorDescription",
+    "basePID",
+    "releaseFormat1",
+    "isSuggested",
+)
@@ -0,0 +1,109 @@
+"""
+This module contains the chunk size tuner of the Cisco support API stages. The chunk size of every endpoint
+is tuned by the measured latency of each chunk within the documented maximum number of serial numbers or
+product IDs per request of the endpoint.
+"""
+
+import math
+import threading
+
+
+__author__ = "Willi Kubny"
+__maintainer__ = "Willi Kubny"
+__license__ = "MIT"
+__email__ = "willi.kubny@kyndryl.com"
+__status__ = "Production"
+
+
+# Fractions of the documented maximum chunk size of an endpoint which are tried by the chunk size tuner
+CHUNK_SIZE_FRACTIONS = (1.0, 0.75, 0.5, 0.25)
+
+
+#### Classes #################################################################################################
+
+
+class ChunkSizeTuner:
+    """
+    The ChunkSizeTuner is shared by all worker threads of the API stages. Every endpoint has a set of
+    candidate chunk sizes from the documented maximum chunk size of the endpoint down to a quarter of it.
+    Each candidate is tried for some chunks first and afterwards the candidate with the highest measured
+    throughput in serials per second is used. Every explore_every chunk tries a neighbour candidate of the
+    best chunk size again, as the latency of the API changes during a run. A pinned chunk size of an
+    endpoint is used as the only candidate and without tuning only the documented maximum is used.
+    """
+
+    # Number of chunks which are tried with each candidate chunk size before the best one is used
+    samples = 3
+    # Every explore_every chunk tries a neighbour candidate of the best chunk size
+    explore_every = 20
+    # Weight of the latest measured throughput in the moving average of a candidate chunk size
+    alpha = 0.3
+
+    def __init__(self, limits: dict, pinned: dict = None, tune: bool = True) -> None:
+        pinned = pinned or {}
+        self._lock = threading.Lock()
+        # Candidate chunk sizes of each endpoint which never exceed the documented maximum chunk size
+        self.candidates = {}
+        for endpoint, limit in limits.items():
+            if endpoint in pinned:
+                sizes = {min(max(int(pinned[endpoint]), 1), limit)}
+            elif tune:
+                sizes = {max(math.ceil(limit * fraction), 1) for fraction in CHUNK_SIZE_FRACTIONS}
+            else:
+                sizes = {limit}
+            self.candidates[endpoint] = sorted(sizes, reverse=True)
+        # The number of issued chunks and the moving average throughput of each candidate chunk size
+        self._issued = {endpoint: dict.fromkeys(sizes, 0) for endpoint, sizes in self.candidates.items()}
+        self._throughput = {endpoint: {} for endpoint in self.candidates}
+        self._chunks = dict.fromkeys(self.candidates, 0)
+
+    def size(self, endpoint: str) -> int:
+        """
+        Returns the chunk size for the next chunk of the endpoint.
+        """
+        with self._lock:
+            candidates = self.candidates[endpoint]
+            # Try every candidate chunk size for some chunks before the best one is used
+            for size in candidates:
+                if self._issued[endpoint][size] < self.samples:
+                    self._issued[endpoint][size] += 1
+                    return size
+
+            best = self._best(endpoint=endpoint)
+            self._chunks[endpoint] += 1
+            if self._chunks[endpoint] % self.explore_every:
+                return best
+
+            # Try the next smaller or larger candidate of the best chunk size in turn
+            index = candidates.index(best)
+            step = 1 if (self._chunks[endpoint] // self.explore_every) % 2 else -1
+            return candidates[min(max(index + step, 0), len(candidates) - 1)]
+
+    def record(self, endpoint: str, size: int, seconds: float) -> None:
+        """
+        Records the latency in seconds of a chunk with size serials of the endpoint. Chunks which are smaller
+        than the requested candidate chunk size like the last chunk of a stage are not recorded.
+        """
+        if size not in self.candidates.get(endpoint, ()):
+            return
+        throughput = size / max(seconds, 1e-6)
+        with self._lock:
+            average = self._throughput[endpoint].get(size)
+            self._throughput[endpoint][size] = (
+                throughput if average is None else self.alpha * throughput + (1 - self.alpha) * average
+            )
+
+    def chosen(self) -> dict:
+        """
+        Returns a dict with the best chunk size of every endpoint.
+        """
+        with self._lock:
+            return {endpoint: self._best(endpoint=endpoint) for endpoint in self.candidates}
+
+    def _best(self, endpoint: str) -> int:
+        # The candidate with the highest throughput or the largest candidate if nothing is measured yet
+        measured = self._throughput[endpoint]
+        if not measured:
+            return self.candidates[endpoint][0]
+
+        return max(measured, key=measured.get)
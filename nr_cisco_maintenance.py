@@ -8,7 +8,10 @@ information against the received data from the Cisco support APIs. Also these ad
 processed into an Excel report and saved to the local disk.
 """
 
+import os
+import sys
 import argparse
+from functools import partial
 from nornir import InitNornir
 from nornir.core import Nornir
 from nornir_maze.cisco_support.utils import (
@@ -20,17 +23,7 @@ from nornir_maze.cisco_support.reports import (
     create_pandas_dataframe_for_report,
     generate_cisco_maintenance_report,
 )
-from nornir_maze.cisco_support.api_calls import (
-    cisco_support_check_authentication,
-    get_sni_owner_coverage_by_serial_number,
-    get_sni_coverage_summary_by_serial_numbers,
-    get_eox_by_serial_numbers,
-    get_ss_suggested_release_by_pid,
-    print_sni_owner_coverage_by_serial_number,
-    print_sni_coverage_summary_by_serial_numbers,
-    print_eox_by_serial_numbers,
-    print_get_ss_suggested_release_by_pid,
-)
+from nornir_maze.cisco_support.api_calls import cisco_support_check_authentication
 from nornir_maze.utils import (
     print_script_banner,
     print_task_title,
@@ -42,6 +35,28 @@ from nornir_maze.utils import (
     construct_filename_with_current_date,
     load_yaml_file,
 )
+from maint_check.args import init_args_for_maint_check
+from maint_check.archive import save_api_archive, load_api_archive
+from maint_check.checkpoint import ApiCheckpoint, load_api_checkpoint
+from maint_check.cache import ApiResponseCache, DEFAULT_CACHE_MAX_ENTRIES
+from maint_check.session import attach_rate_limiter, init_shared_session
+from maint_check.ratelimit import AdaptiveRateLimiter
+from maint_check.tuning import ChunkSizeTuner
+from maint_check.hedging import HedgePolicy, DEFAULT_HEDGE_MAX_RATIO
+from maint_check.breaker import (
+    CircuitBreaker,
+    DEFAULT_BREAKER_BACKOFF,
+    DEFAULT_BREAKER_COOLDOWN,
+    mark_unavailable_columns,
+)
+from maint_check.metrics import METRICS
+from maint_check.profiler import SectionProfiler
+from maint_check.facts import DeviceFactCache
+from maint_check.snapshot import snapshot_inventory_config
+from maint_check.snmp import SnmpRunner, prepare_snmp_data, snmp_available
+from maint_check.collect import NornirSerialStream, collect_nornir_serials, prepare_cached_nornir_data
+from maint_check.dispatch import ApiStageScheduler, apply_stage_deltas
+from maint_check.stages import API_STAGES, prune_api_stages, report_fields
 
 
 __author__ = "Willi Kubny"
@@ -59,13 +74,23 @@ def _init_nornir(args: argparse.Namespace) -> Nornir:
     This function supports the readability and is used within the main() function. The Nornir inventory will
     be initialized, the default username and password will be transformed and loaded from environment
     variables. The same transformation to load the environment variables is done for the mandatory Cisco
-    support API credentials and also for all other inventory keys which start with _env. The function returns
-    a filtered Nornir object or quits with an error message in case of issues during the function.
+    support API credentials and also for all other inventory keys which start with _env. With the
+    --nornir_snapshot argument the inventory is loaded from a snapshot which is rebuilt only after a change
+    of the inventory files. The function returns a filtered Nornir object or quits with an error message in
+    case of issues during the function.
     """
     # pylint: disable=invalid-name
 
-    # Initialize Nornir Object with a config file
-    nr = InitNornir(config_file="inventory/nr_config.yaml")
+    # Initialize Nornir Object with a config file and optional with the inventory of the snapshot
+    config_file = "inventory/nr_config.yaml"
+    nr = (
+        InitNornir(
+            config_file=config_file,
+            inventory=snapshot_inventory_config(config_file=config_file, snapshot_file=args.nornir_snapshot),
+        )
+        if args.nornir_snapshot
+        else InitNornir(config_file=config_file)
+    )
 
     # Transform the Nornir default username and password from environment variables
     nr_transform_default_creds_from_env(nr_obj=nr, verbose=args.verbose)
@@ -88,6 +113,87 @@ def _init_nornir(args: argparse.Namespace) -> Nornir:
     return nr_obj
 
 
+def _collect_nornir_serials(nr_obj: Nornir, args: argparse.Namespace) -> tuple:
+    """
+    This function supports the readability and is used within the main() function. The serials of all Nornir
+    hosts are collected with args.nornir_workers threads and the args.nornir_timeout per host or at once
+    without the --nornir_workers argument. With the --nornir_fact_cache argument only the hosts without valid
+    cached facts are collected. With the --nornir_snmp argument the serials are collected with SNMP ENTITY-MIB
+    walks instead of the CLI. The timed out and failed hosts and the slowest hosts are printed and a tuple
+    of the serials dict and None is returned. With the --nornir_stream argument the hosts are not collected
+    yet and a tuple of an empty serials dict and the NornirSerialStream for the API stages is returned.
+    """
+    facts = None
+    if args.nornir_fact_cache:
+        facts = DeviceFactCache(file=args.nornir_fact_cache, ttl=args.nornir_fact_ttl)
+        print(f"PYTHON load Nornir fact cache {args.nornir_fact_cache}")
+
+    # The SNMP collector replaces prepare_nornir_data() and needs the optional pysnmp package
+    collector = prepare_nornir_data
+    if args.nornir_snmp:
+        if not snmp_available():
+            exit_error(
+                task_text="NORNIR cisco maintenance status",
+                text="The --nornir_snmp argument needs the pysnmp package",
+            )
+        collector = partial(
+            prepare_snmp_data,
+            runner=SnmpRunner(),
+            community=args.snmp_community,
+            port=args.snmp_port,
+            timeout=args.snmp_timeout,
+        )
+
+    if not args.nornir_workers:
+        if not facts:
+            return prepare_nornir_data(nr_obj=nr_obj, verbose=args.verbose), None
+        serials = prepare_cached_nornir_data(nr_obj=nr_obj, facts=facts, verbose=args.verbose)
+        print(f"PYTHON Nornir fact cache: {facts.hits} hosts cached, {facts.misses} hosts collected")
+        return serials, None
+
+    if args.nornir_stream:
+        print(f"PYTHON stream the serials of {len(nr_obj.inventory.hosts)} Nornir hosts to the API stages")
+        stream = NornirSerialStream(
+            nr_obj=nr_obj,
+            workers=args.nornir_workers,
+            timeout=args.nornir_timeout,
+            verbose=args.verbose,
+            facts=facts,
+            collector=collector,
+        )
+        return {}, stream
+
+    serials, results = collect_nornir_serials(
+        nr_obj=nr_obj,
+        workers=args.nornir_workers,
+        timeout=args.nornir_timeout,
+        verbose=args.verbose,
+        facts=facts,
+        collector=collector,
+    )
+    _print_nornir_collection(results=results)
+
+    return serials, None
+
+
+def _print_nornir_collection(results: list) -> None:
+    """
+    This function supports the readability and is used within the main() function. The timed out and failed
+    hosts and the ten slowest hosts of the HostSerials results are printed.
+    """
+    # Print the timed out and failed hosts and the ten slowest hosts with their collection time
+    for status, text in (("ok", ""), ("cached", ""), ("timeout", "timed out"), ("failed", "failed")):
+        hosts = [result.host for result in results if result.status == status]
+        METRICS.set("nornir_hosts", len(hosts), help_text="Nornir hosts by collection status", status=status)
+        if hosts and text:
+            print(f"PYTHON {len(hosts)} Nornir hosts {text}: {', '.join(hosts)}")
+        elif hosts and status == "cached":
+            print(f"PYTHON {len(hosts)} Nornir hosts served from the fact cache")
+    slowest = [f"{result.host} ({result.seconds:.1f}s)" for result in results[:10] if result.status == "ok"]
+    if slowest:
+        print(f"PYTHON slowest Nornir hosts: {', '.join(slowest)}")
+
+
 def _load_report_yaml_config(report_cfg, args):
     """ """
     # If the report_config file string is available
@@ -116,6 +222,328 @@ def _load_report_yaml_config(report_cfg, args):
     return report_cfg
 
 
+def _load_api_yaml_config(args: argparse.Namespace) -> dict:
+    """
+    This function supports the readability and is used within the main() function. It returns the Cisco
+    support API settings like the cache TTL, the rate limit, the chunk size, the hedge ratio and the circuit
+    breaker of the --api_config YAML file or an empty dict to use the defaults. The API settings are loaded
+    from the same file in the Nornir and the static mode and with or without the --report argument.
+    """
+    if not args.api_config:
+        return {}
+
+    # Load the API settings from the YAML config file as python dictionary
+    config = load_yaml_file(
+        file=args.api_config, text="PYTHON load API yaml config file", verbose=args.verbose
+    )
+
+    return config or {}
+
+
+def _init_args() -> argparse.Namespace:
+    """
+    This function supports the readability and is used within the main() function. It initialize the
+    maint_check arguments and the script arguments of nornir_maze and returns one namespace of both. With the
+    --profile argument the section profiler is installed for the print_task_title() function of this module.
+    """
+    # Initialize the maint_check arguments first as they are removed from sys.argv afterwards
+    maint_check_args = init_args_for_maint_check()
+    # Initialize the script arguments with ArgParse to define the further script execution
+    args = init_args_for_cisco_maintenance()
+    # Add the maint_check arguments to the script arguments namespace
+    vars(args).update(vars(maint_check_args))
+
+    # Profile every section of the script which starts with print_task_title() until the script exits
+    if args.profile:
+        SectionProfiler(pstats_dir=args.profile_dir).install(
+            module=sys.modules[__name__], title="Initialize ArgParse"
+        )
+
+    return args
+
+
+def _init_api_response_cache(args: argparse.Namespace, api_cfg: dict):
+    """
+    This function supports the readability and is used within the main() function. It returns the Cisco
+    support API response cache if the --api_cache argument is set or None otherwise. The TTL per API stage and
+    the maximum number of cache entries can be set in the API yaml config file.
+    """
+    if not args.api_cache:
+        return None
+
+    cache = ApiResponseCache(
+        file=args.api_cache,
+        ttl=api_cfg.get("api_cache_ttl"),
+        max_entries=api_cfg.get("api_cache_max_entries", DEFAULT_CACHE_MAX_ENTRIES),
+    )
+    print(f"PYTHON load Cisco support API response cache {args.api_cache}")
+
+    return cache
+
+
+def _select_api_stages(args: argparse.Namespace, report_cfg: dict) -> tuple:
+    """
+    This function supports the readability and is used within the main() function. For a report with a column
+    order and the --api_prune_fields argument all Cisco support API stages which provide none of the report
+    columns are skipped, as long as no other selected stage depends on them. The skipped stages are printed
+    and the selected stages are returned.
+    """
+    # Without pruning, a report or a column order every column and therefore every API stage is needed
+    if not args.api_prune_fields or not args.report or not report_cfg["df_order"]:
+        return API_STAGES
+
+    stages, pruned = prune_api_stages(stages=API_STAGES, columns=report_cfg["df_order"])
+    if pruned:
+        print(
+            "PYTHON skip Cisco support API stages without report columns: "
+            + ", ".join(stage.title for stage in pruned)
+        )
+
+    return stages
+
+
+def _init_api_stage_scheduler(
+    stages: tuple, api_creds: tuple, args: argparse.Namespace, report_cfg: dict, api_cfg: dict
+) -> ApiStageScheduler:
+    """
+    This function supports the readability and is used within the main() function. It returns the scheduler of
+    the Cisco support API stages with the optional API response cache, the adaptive rate limiter and the chunk
+    size tuner for concurrent API requests, the optional hedge policy, the opt-in circuit breaker, the
+    optional checkpoint and the report fields to keep. The settings of these components are taken from the
+    api_cfg.
+    """
+    # The circuit breaker is opt-in, without api_breaker_failures the script exits on the first failed request
+    breaker_failures = api_cfg.get("api_breaker_failures")
+    # Concurrent API requests share the adaptive rate limiter with the request budget per API endpoint
+    limiter = AdaptiveRateLimiter(budgets=api_cfg.get("api_rate_limit")) if args.api_workers > 1 else None
+    # The shared session retries a HTTP 429 response after the limiter throttled the endpoint
+    attach_rate_limiter(limiter=limiter)
+    # The chunk size of each API is pinned by the API config or tuned within the documented maximum
+    tuner = (
+        ChunkSizeTuner(
+            limits={stage.endpoint: stage.chunk_size for stage in stages},
+            pinned=api_cfg.get("api_chunk_size"),
+            tune=args.api_tune_chunks,
+        )
+        if args.api_workers > 1
+        else None
+    )
+    # Prune the API data to the fields of the report columns to keep the memory usage low
+    fields = (
+        report_fields(columns=report_cfg["df_order"] + (report_cfg["df_date_columns"] or []))
+        if args.api_prune_fields and args.report and report_cfg["df_order"]
+        else None
+    )
+
+    return ApiStageScheduler(
+        stages=stages,
+        api_creds=api_creds,
+        workers=args.api_workers,
+        cache=_init_api_response_cache(args=args, api_cfg=api_cfg),
+        limiter=limiter,
+        checkpoint=(
+            ApiCheckpoint(file=args.api_checkpoint, chunks=args.api_checkpoint_chunks)
+            if args.api_checkpoint
+            else None
+        ),
+        fields=fields,
+        tuner=tuner,
+        hedger=(
+            HedgePolicy(
+                percentile=args.api_hedge,
+                max_ratio=api_cfg.get("api_hedge_max_ratio", DEFAULT_HEDGE_MAX_RATIO),
+            )
+            if args.api_hedge and args.api_workers > 1
+            else None
+        ),
+        breaker=(
+            CircuitBreaker(
+                failures=breaker_failures,
+                backoff=api_cfg.get("api_breaker_backoff", DEFAULT_BREAKER_BACKOFF),
+                cooldown=api_cfg.get("api_breaker_cooldown", DEFAULT_BREAKER_COOLDOWN),
+            )
+            if breaker_failures
+            else None
+        ),
+    )
+
+
+def _run_cisco_support_api_stages(  # pylint: disable=too-many-arguments
+    stages: tuple,
+    serials: dict,
+    api_creds: tuple,
+    args: argparse.Namespace,
+    report_cfg: dict,
+    *,
+    stream: NornirSerialStream = None,
+) -> tuple:
+    """
+    This function supports the readability and is used within the main() function. The Cisco support API
+    stages like SNIgetOwnerCoverageStatusBySerialNumbers, SNIgetCoverageSummaryBySerialNumbers,
+    EOXgetBySerialNumbers and getSuggestedReleasesByProductIDs run concurrent with args.api_workers threads.
+    The optional API response cache and the adaptive rate limiter are shared by all stages. With the
+    --api_prune_fields argument only the API stages and fields of the report columns are kept. With the
+    --api_checkpoint argument the deltas of all completed chunks are written to the checkpoint file, which is
+    removed after all stages are completed. With the --api_resume argument the serials dict and the deltas of
+    the checkpoint are loaded and only the remaining serials are requested. With the --api_tune_chunks
+    argument the chunk size of each API is tuned by the measured latency and with the --api_hedge argument
+    slow chunk requests are sent again. The serials of the optional NornirSerialStream are requested while the
+    Nornir hosts are collected. The function prints the statistics of the run and returns a tuple of the
+    serials dict, the deltas of every serial for each stage name and the unavailable serials for each stage
+    name of an API endpoint with an open circuit breaker.
+    """
+    # Load the serials dict and the deltas of all completed chunks of the checkpoint to resume a run
+    resume_deltas = None
+    if args.api_resume:
+        if not os.path.exists(args.api_checkpoint):
+            exit_error(
+                task_text="NORNIR cisco maintenance status",
+                text=f"Checkpoint {args.api_checkpoint} to resume the run not found",
+            )
+        serials, resume_deltas = load_api_checkpoint(file=args.api_checkpoint)
+        print(f"PYTHON resume Cisco support API stages from checkpoint {args.api_checkpoint}")
+
+    # Load the API settings of the API yaml config file in both modes and with or without a report
+    api_cfg = _load_api_yaml_config(args=args)
+    # Initialize the scheduler of the API stages and write the serials dict to a new checkpoint file
+    scheduler = _init_api_stage_scheduler(
+        stages=stages, api_creds=api_creds, args=args, report_cfg=report_cfg, api_cfg=api_cfg
+    )
+    if scheduler.checkpoint and not resume_deltas:
+        scheduler.checkpoint.start(serials=serials)
+
+    stage_deltas = scheduler.run(serial_dict=serials, resume_deltas=resume_deltas, stream=stream)
+
+    # The streamed serials are added in the order of completion and are sorted by the Nornir inventory
+    if stream:
+        serials = stream.serials()
+        _print_nornir_collection(results=stream.results)
+
+    # The checkpoint is not needed anymore after all stages are completed
+    if scheduler.checkpoint:
+        scheduler.checkpoint.remove()
+
+    # Print the number of HTTP 429 responses per API endpoint
+    for endpoint, count in (scheduler.limiter.throttled.items() if scheduler.limiter else ()):
+        if count:
+            print(f"PYTHON Cisco support API {endpoint}: {count} throttled requests (HTTP 429) retried")
+    # Print the chunk size of each API endpoint which was tuned by the measured latency
+    if scheduler.tuner and args.api_tune_chunks:
+        chosen = ", ".join(f"{endpoint}={size}" for endpoint, size in scheduler.tuner.chosen().items())
+        print(f"PYTHON Cisco support API tuned chunk sizes: {chosen}")
+    # Print the number of hedged requests per API endpoint and how often the hedged request was faster
+    for endpoint, count in (scheduler.hedger.hedged.items() if scheduler.hedger else ()):
+        print(
+            f"PYTHON Cisco support API {endpoint}: {count} hedged requests, "
+            f"{scheduler.hedger.won.get(endpoint, 0)} responded first"
+        )
+    # Print the number of serials which were not requested as their PID was already requested
+    for stage in (stage for stage in stages if scheduler.stats[stage.name]["deduplicated"]):
+        print(
+            f"PYTHON {stage.title}: {scheduler.stats[stage.name]['requested']} unique requests, "
+            f"{scheduler.stats[stage.name]['deduplicated']} lookups saved by deduplication"
+        )
+    if scheduler.cache:
+        print(
+            f"PYTHON Cisco support API response cache: {scheduler.cache.hits} hits, "
+            f"{scheduler.cache.misses} misses"
+        )
+        scheduler.cache.close()
+    # Print the API endpoints with an open circuit breaker and the number of unavailable serials per stage
+    for endpoint, error in (scheduler.breaker.opened.items() if scheduler.breaker else ()):
+        print(f"PYTHON Cisco support API {endpoint}: circuit breaker open after repeated failures ({error})")
+    for stage in (stage for stage in stages if scheduler.unavailable[stage.name]):
+        print(f"PYTHON {stage.title}: {len(scheduler.unavailable[stage.name])} serials unavailable")
+
+    _record_api_stage_metrics(stages=stages, scheduler=scheduler)
+
+    return serials, stage_deltas, scheduler.unavailable
+
+
+def _record_api_stage_metrics(stages: tuple, scheduler: ApiStageScheduler) -> None:
+    """
+    This function supports the readability and is used within the main() function. It records the retries,
+    the hedged requests and the unavailable and deduplicated serials of the API stages scheduler in the
+    METRICS registry. The HTTP requests itself are recorded by the shared session.
+    """
+    for endpoint, count in (scheduler.limiter.throttled.items() if scheduler.limiter else ()):
+        METRICS.inc(
+            "api_retries_total",
+            count,
+            help_text="Retried Cisco support API chunk requests",
+            endpoint=endpoint,
+            reason="throttled",
+        )
+    for endpoint, count in (scheduler.breaker.failed.items() if scheduler.breaker else ()):
+        METRICS.inc(
+            "api_retries_total",
+            count,
+            help_text="Retried Cisco support API chunk requests",
+            endpoint=endpoint,
+            reason="failed",
+        )
+    for endpoint, count in (scheduler.hedger.hedged.items() if scheduler.hedger else ()):
+        METRICS.inc(
+            "api_hedged_requests_total",
+            count,
+            help_text="Hedged Cisco support API chunk requests",
+            endpoint=endpoint,
+        )
+    for stage in stages:
+        METRICS.set(
+            "api_unavailable_serials",
+            len(scheduler.unavailable[stage.name]),
+            help_text="Serials which could not be requested as the circuit breaker of the endpoint opened",
+            stage=stage.name,
+        )
+        METRICS.set(
+            "api_deduplicated_serials",
+            scheduler.stats[stage.name]["deduplicated"],
+            help_text="Serials which were not requested as their request key was already requested",
+            stage=stage.name,
+        )
+    if scheduler.cache:
+        METRICS.inc("api_cache_hits_total", scheduler.cache.hits, help_text="Cisco support API cache hits")
+        METRICS.inc(
+            "api_cache_misses_total", scheduler.cache.misses, help_text="Cisco support API cache misses"
+        )
+
+
+def _write_metrics_textfile(args: argparse.Namespace, serials: dict) -> None:
+    """
+    This function supports the readability and is used within the main() function. It writes the METRICS
+    registry with the number of serials as Prometheus textfile if the --metrics_textfile argument is set.
+    """
+    if not args.metrics_textfile:
+        return
+
+    METRICS.set("serials", len(serials), help_text="Serials of the Cisco maintenance check")
+    METRICS.write_textfile(file=args.metrics_textfile)
+    print(f"PYTHON write Prometheus metrics textfile {args.metrics_textfile}")
+
+
+def _exit_script(args: argparse.Namespace, serials: dict, unavailable: dict) -> None:
+    """
+    This function supports the readability and is used within the main() function. It writes the optional
+    Prometheus textfile and exits the script. The script exits with an error if the Cisco support API data of
+    any serial is unavailable as the circuit breaker of an API endpoint opened, as the report is incomplete.
+    """
+    _write_metrics_textfile(args=args, serials=serials)
+
+    # Exit with a non-zero exit code to not hide the unavailable API data from a cron job or a pipeline
+    incomplete = {serial for stage_serials in unavailable.values() for serial in stage_serials}
+    if incomplete:
+        print(
+            f"WARNING: The Cisco support API data of {len(incomplete)} serials is unavailable as the circuit "
+            "breaker of an API endpoint opened. The affected report columns are set to 'unavailable'."
+        )
+        exit_error(task_text="NORNIR cisco maintenance status", text="Bad news! The report is incomplete!")
+
+    exit_info(
+        task_text="NORNIR cisco maintenance status", text="Good news! The Script successfully finished!"
+    )
+
+
 def main() -> None:
     """
     Main function is executed when the file is directly executed.
@@ -131,10 +559,14 @@ def main() -> None:
 
     print_task_title("Initialize ArgParse")
     # Initialize the script arguments with ArgParse to define the further script execution
-    args = init_args_for_cisco_maintenance()
+    args = _init_args()
 
     # Create a dict for configuration specifications
     report_cfg = {}
+    # The serials dict stays empty if it is loaded from the replay archive or the checkpoint
+    serials = {}
+    # The serials of the Nornir hosts are only streamed with the --nornir_stream argument
+    serial_stream = None
 
     if args.nornir:
         print_task_title("Initialize Nornir")
@@ -159,14 +591,21 @@ def main() -> None:
         report_cfg["ibm_tss_file"] = (
             nr_obj.inventory.defaults.data["cisco_maintenance_report"]["ibm_tss_file"] if args.tss else False
         )
-        print_task_title("Prepare Nornir Data")
-        # Prepare the serials dict for later processing
-        serials = prepare_nornir_data(nr_obj=nr_obj, verbose=args.verbose)
+        # The serials dict is part of the replay archive or the checkpoint and is not prepared with Nornir
+        if not (args.api_replay or args.api_resume):
+            print_task_title("Prepare Nornir Data")
+            # Prepare the serials dict for later processing
+            # With the --nornir_stream argument the serials are collected during the Cisco support API stages
+            with METRICS.phase("nornir_collection"):
+                serials, serial_stream = _collect_nornir_serials(nr_obj=nr_obj, args=args)
 
     else:
-        print_task_title("Prepare Static Data")
-        # Prepare the serials dict for later processing
-        serials = prepare_static_serials(args=args)
+        # The serials dict is part of the replay archive or the checkpoint and is not prepared
+        if not (args.api_replay or args.api_resume):
+            print_task_title("Prepare Static Data")
+            # Prepare the serials dict for later processing
+            with METRICS.phase("static_collection"):
+                serials = prepare_static_serials(args=args)
         # Prepare the Cisco support API key and the secret in a tuple
         api_creds = (args.api_key, args.api_secret)
         # Create the report_config string for later YAML file load
@@ -180,56 +619,90 @@ def main() -> None:
 
     #### Get Cisco Support-API Data ##########################################################################
 
-    print_task_title("Check Cisco support API OAuth2 client credentials grant flow")
-
-    # Check the API authentication with the client key and secret to get an access token
-    # The script will exit with an error message in case the authentication fails
-    if not cisco_support_check_authentication(api_creds=api_creds, verbose=args.verbose, silent=False):
-        exit_error(task_text="NORNIR cisco maintenance status", text="Bad news! The script failed!")
+    # Load the yaml report config file before the API stages as the report columns select the API stages
+    report_cfg = _load_report_yaml_config(report_cfg=report_cfg, args=args) if args.report else report_cfg
+    # Select the API stages which are needed for the report columns and skip all other API stages
+    api_stages = _select_api_stages(args=args, report_cfg=report_cfg)
 
-    print_task_title("Gather Cisco support API data for serial numbers")
+    # The serials per stage name which are unavailable as the circuit breaker of their API endpoint opened
+    unavailable = {}
 
-    # Cisco Support API Call SNIgetOwnerCoverageStatusBySerialNumbers and update the serials dictionary
-    serials = get_sni_owner_coverage_by_serial_number(serial_dict=serials, api_creds=api_creds)
-    # Print the results of get_sni_owner_coverage_by_serial_number()
-    print_sni_owner_coverage_by_serial_number(serial_dict=serials, verbose=args.verbose)
+    if args.api_replay:
+        print_task_title("Replay Cisco support API data")
+        # Load the serials dict and the deltas of all API stages from the replay archive without any API call
+        serials, stage_deltas = load_api_archive(file=args.api_replay)
+        print(f"PYTHON load Cisco support API archive {args.api_replay}")
 
-    # Cisco Support API Call SNIgetCoverageSummaryBySerialNumbers and update the serials dictionary
-    serials = get_sni_coverage_summary_by_serial_numbers(serial_dict=serials, api_creds=api_creds)
-    # Print the results of get_sni_coverage_summary_by_serial_numbers()
-    print_sni_coverage_summary_by_serial_numbers(serial_dict=serials, verbose=args.verbose)
+    else:
+        print_task_title("Check Cisco support API OAuth2 client credentials grant flow")
 
-    # Cisco Support API Call EOXgetBySerialNumbers and update the serials dictionary
-    serials = get_eox_by_serial_numbers(serial_dict=serials, api_creds=api_creds)
-    # Print the results of get_eox_by_serial_numbers()
-    print_eox_by_serial_numbers(serial_dict=serials, verbose=args.verbose)
+        # Route all Cisco support API requests through one HTTP session with a keep-alive connection pool
+        # The optional base URL override sends the requests to another server like the local mock API server
+        # The optional token file reuses the OAuth2 access token of an earlier run until it expires
+        init_shared_session(
+            pool_size=max(args.api_workers, 10), base_url=args.api_base_url, token_file=args.api_token_cache
+        )
 
-    # Cisco Support API Call getSuggestedReleasesByProductIDs and update the serials dictionary
-    serials = get_ss_suggested_release_by_pid(serial_dict=serials, api_creds=api_creds)
-    # Print the results of get_ss_suggested_release_by_pid()
-    print_get_ss_suggested_release_by_pid(serial_dict=serials, verbose=args.verbose)
+        # Check the API authentication with the client key and secret to get an access token
+        # The script will exit with an error message in case the authentication fails
+        if not cisco_support_check_authentication(api_creds=api_creds, verbose=args.verbose, silent=False):
+            exit_error(task_text="NORNIR cisco maintenance status", text="Bad news! The script failed!")
+
+        print_task_title("Gather Cisco support API data for serial numbers")
+
+        # Run all selected Cisco support API stages and get the deltas of every serial for each stage
+        with METRICS.phase("cisco_support_api"):
+            serials, stage_deltas, unavailable = _run_cisco_support_api_stages(
+                stages=api_stages,
+                serials=serials,
+                api_creds=api_creds,
+                args=args,
+                report_cfg=report_cfg,
+                stream=serial_stream,
+            )
+
+        # Save the serials dict and the deltas of all API stages to the record archive
+        if args.api_record:
+            save_api_archive(file=args.api_record, serials=serials, stage_deltas=stage_deltas)
+            print(f"PYTHON save Cisco support API archive {args.api_record}")
+
+    # Update the serials dictionary with the results of all selected Cisco support API stages
+    serials = apply_stage_deltas(serial_dict=serials, stages=api_stages, stage_deltas=stage_deltas)
+
+    # Print the results of all selected Cisco support API stages for all serials which are not unavailable
+    for stage in api_stages:
+        stage.print_call(
+            serial_dict=(
+                {
+                    serial: record
+                    for serial, record in serials.items()
+                    if serial not in unavailable[stage.name]
+                }
+                if unavailable.get(stage.name)
+                else serials
+            ),
+            verbose=args.verbose,
+        )
 
     #### Prepate the Pandas report data ######################################################################
 
     # Exit the script if the args.report argument is not set
     if not args.report:
-        exit_info(
-            task_text="NORNIR cisco maintenance status", text="Good news! The Script successfully finished!"
-        )
+        _exit_script(args=args, serials=serials, unavailable=unavailable)
 
     print_task_title("Prepare Cisco maintenance report")
 
-    # Load the yaml report config file
-    report_cfg = _load_report_yaml_config(report_cfg=report_cfg, args=args)
-
     # Prepare the report data and create a pandas dataframe
-    df = create_pandas_dataframe_for_report(
-        serials_dict=serials,
-        args=args,
-        df_order=report_cfg["df_order"],
-        df_date_columns=report_cfg["df_date_columns"],
-        tss_report=report_cfg["ibm_tss_file"],
-    )
+    with METRICS.phase("dataframe"):
+        df = create_pandas_dataframe_for_report(
+            serials_dict=serials,
+            args=args,
+            df_order=report_cfg["df_order"],
+            df_date_columns=report_cfg["df_date_columns"],
+            tss_report=report_cfg["ibm_tss_file"],
+        )
+        # Mark the report columns of the API stages as unavailable for the serials which were not requested
+        df = mark_unavailable_columns(df=df, stages=api_stages, unavailable=unavailable)
 
     #### Generate Cisco maintenance report Excel #############################################################
 
@@ -243,11 +716,10 @@ def main() -> None:
     )
 
     # Generate the Cisco Maintenance report Excel file specified by the report_file with the pandas dataframe
-    generate_cisco_maintenance_report(df=df, report_cfg=report_cfg)
+    with METRICS.phase("excel"):
+        generate_cisco_maintenance_report(df=df, report_cfg=report_cfg)
 
-    exit_info(
-        task_text="NORNIR cisco maintenance status", text="Good news! The Script successfully finished!"
-    )
+    _exit_script(args=args, serials=serials, unavailable=unavailable)
 
 
 if __name__ == "__main__":
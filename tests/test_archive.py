@@ -0,0 +1,59 @@
+"""
+This module contains the tests of the record and replay archive of the maint_check.archive module.
+"""
+
+import os
+import gzip
+import json
+import tempfile
+import unittest
+from maint_check.archive import save_api_archive, load_api_archive
+
+__author__ = "Willi Kubny"
+__maintainer__ = "Willi Kubny"
+__license__ = "MIT"
+__email__ = "willi.kubny@kyndryl.com"
+__status__ = "Production"
+
+
+#### Tests ###################################################################################################
+
+
+class ApiArchiveTest(unittest.TestCase):
+    """
+    Tests the round-trip and the version check of the compressed Cisco support API archive.
+    """
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.file = os.path.join(self.directory.name, "archive", "api_archive.json.gz")
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_round_trip(self) -> None:
+        """
+        The loaded serials dict and stage deltas equal the saved ones and no temporary file is left.
+        """
+        serials = {"FOC1": {"host": "sw01", "nr_data": {"switch_num": "1", "current_version": "17.9.4"}}}
+        stage_deltas = {"eox": {"FOC1": {"eox": {"EOXExternalAnnouncementDate": {"value": "2026-01-31"}}}}}
+
+        save_api_archive(file=self.file, serials=serials, stage_deltas=stage_deltas)
+
+        self.assertEqual(load_api_archive(file=self.file), (serials, stage_deltas))
+        self.assertEqual(os.listdir(os.path.dirname(self.file)), ["api_archive.json.gz"])
+
+    def test_unsupported_version(self) -> None:
+        """
+        An archive of another version raises a ValueError.
+        """
+        os.makedirs(os.path.dirname(self.file))
+        with gzip.open(self.file, "wt", encoding="utf-8") as archive:
+            json.dump({"version": 0, "serials": {}, "stage_deltas": {}}, archive)
+
+        with self.assertRaises(ValueError):
+            load_api_archive(file=self.file)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+"""
+This module contains the tests of the CircuitBreaker of the maint_check.breaker module. The clock of the
+circuit breaker is replaced by a mock, so the cooldown and the backoff are tested without waiting.
+"""
+
+import unittest
+from unittest import mock
+from maint_check.breaker import CircuitBreaker, MAX_BREAKER_BACKOFF
+
+__author__ = "Willi Kubny"
+__maintainer__ = "Willi Kubny"
+__license__ = "MIT"
+__email__ = "willi.kubny@kyndryl.com"
+__status__ = "Production"
+
+
+#### Tests ###################################################################################################
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    """
+    Tests the closed, the open and the half-open state of the circuit breaker of an endpoint.
+    """
+
+    def setUp(self) -> None:
+        self.clock = mock.patch("maint_check.breaker.time")
+        self.time = self.clock.start()
+        self.time.monotonic.return_value = 100.0
+        self.breaker = CircuitBreaker(failures=3, backoff=1.0, cooldown=60.0)
+
+    def tearDown(self) -> None:
+        self.clock.stop()
+
+    def _fail(self, count: int) -> None:
+        # Count failed requests of the eox endpoint
+        for _ in range(count):
+            self.breaker.failure(endpoint="eox", error=SystemExit(1))
+
+    def test_open(self) -> None:
+        """
+        The circuit breaker opens after failures consecutive failures of the endpoint only.
+        """
+        self._fail(count=2)
+        self.breaker.success(endpoint="eox")
+        self._fail(count=2)
+        self.assertTrue(self.breaker.allow(endpoint="eox"))
+
+        self._fail(count=1)
+
+        self.assertFalse(self.breaker.allow(endpoint="eox"))
+        self.assertTrue(self.breaker.allow(endpoint="sni"))
+        self.assertEqual(list(self.breaker.opened), ["eox"])
+        self.assertEqual(self.breaker.failed, {"eox": 5})
+
+    def test_half_open(self) -> None:
+        """
+        After the cooldown a single probe request passes, a failed probe opens the circuit breaker again and
+        a successful probe closes it.
+        """
+        self._fail(count=3)
+        self.time.monotonic.return_value = 159.0
+        self.assertFalse(self.breaker.allow(endpoint="eox"))
+
+        self.time.monotonic.return_value = 160.0
+        self.assertTrue(self.breaker.allow(endpoint="eox"))
+        self.assertFalse(self.breaker.allow(endpoint="eox"))
+        self._fail(count=1)
+        self.time.monotonic.return_value = 219.0
+        self.assertFalse(self.breaker.allow(endpoint="eox"))
+
+        self.time.monotonic.return_value = 220.0
+        self.assertTrue(self.breaker.allow(endpoint="eox"))
+        self.breaker.success(endpoint="eox")
+
+        self.assertTrue(self.breaker.allow(endpoint="eox"))
+        self.assertEqual(self.breaker.opened, {})
+
+    def test_backoff(self) -> None:
+        """
+        The backoff doubles with every consecutive failure up to MAX_BREAKER_BACKOFF and is skipped while the
+        circuit breaker is open.
+        """
+        breaker = CircuitBreaker(failures=10, backoff=1.0)
+        for _ in range(7):
+            breaker.failure(endpoint="ss", error=SystemExit(1))
+            breaker.wait(endpoint="ss")
+        self.assertEqual(
+            [call.args[0] for call in self.time.sleep.call_args_list], [1.0, 2.0, 4.0, 8.0, 16.0, 30.0, 30.0]
+        )
+        self.assertEqual(MAX_BREAKER_BACKOFF, 30.0)
+
+        self._fail(count=3)
+        self.breaker.wait(endpoint="eox")
+        self.assertEqual(self.time.sleep.call_count, 7)
+
+
+if __name__ == "__main__":
+    unittest.main()
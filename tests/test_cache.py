@@ -0,0 +1,93 @@
+"""
+This module contains the tests of the ApiResponseCache of the maint_check.cache module. The clock of the cache
+is replaced by a mock, so the TTL and the LRU eviction are tested without waiting.
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+from maint_check.cache import ApiResponseCache
+
+__author__ = "Willi Kubny"
+__maintainer__ = "Willi Kubny"
+__license__ = "MIT"
+__email__ = "willi.kubny@kyndryl.com"
+__status__ = "Production"
+
+
+#### Tests ###################################################################################################
+
+
+class ApiResponseCacheTest(unittest.TestCase):
+    """
+    Tests the TTL per endpoint and the size-bounded LRU eviction of the SQLite response cache.
+    """
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.file = os.path.join(self.directory.name, "cache", "api_cache.db")
+        self.clock = mock.patch("maint_check.cache.time.time", return_value=1000.0)
+        self.time = self.clock.start()
+
+    def tearDown(self) -> None:
+        self.clock.stop()
+        self.directory.cleanup()
+
+    def test_ttl(self) -> None:
+        """
+        An entry is returned until the TTL of its endpoint has passed and counted as miss afterwards.
+        """
+        cache = ApiResponseCache(file=self.file, ttl={"eox": 60})
+        cache.set_many(endpoint="eox", keys={"FOC1": "FOC1", "FOC2": None}, data={"FOC1": {"eox": "2027"}})
+
+        self.time.return_value = 1060.0
+        self.assertEqual(cache.get_many(endpoint="eox", keys={"FOC1": "FOC1"}), {"FOC1": {"eox": "2027"}})
+        self.time.return_value = 1061.0
+        self.assertEqual(cache.get_many(endpoint="eox", keys={"FOC1": "FOC1", "FOC2": None}), {})
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+        cache.close()
+
+    def test_lru_eviction(self) -> None:
+        """
+        The least recently accessed entries are evicted above max_entries and a read counts as access.
+        """
+        cache = ApiResponseCache(file=self.file, max_entries=2)
+        for second, serial in enumerate(("FOC1", "FOC2")):
+            self.time.return_value = 1000.0 + second
+            cache.set_many(
+                endpoint="sni_coverage_summary", keys={serial: serial}, data={serial: {"covered": True}}
+            )
+
+        # The read of FOC1 makes FOC2 the least recently used entry
+        self.time.return_value = 1002.0
+        cache.get_many(endpoint="sni_coverage_summary", keys={"FOC1": "FOC1"})
+        self.time.return_value = 1003.0
+        cache.set_many(
+            endpoint="sni_coverage_summary", keys={"FOC3": "FOC3"}, data={"FOC3": {"covered": False}}
+        )
+
+        keys = {serial: serial for serial in ("FOC1", "FOC2", "FOC3")}
+        self.assertEqual(sorted(cache.get_many(endpoint="sni_coverage_summary", keys=keys)), ["FOC1", "FOC3"])
+        cache.close()
+
+    def test_persistence(self) -> None:
+        """
+        The entries are kept in the database file and are available to a new cache of the next run.
+        """
+        cache = ApiResponseCache(file=self.file)
+        cache.set_many(
+            endpoint="ss_suggested_release", keys={"FOC1": "C9300-48P"}, data={"FOC1": {"release": "17.9.4"}}
+        )
+        cache.close()
+
+        cache = ApiResponseCache(file=self.file)
+        self.assertEqual(
+            cache.get_many(endpoint="ss_suggested_release", keys={"FOC9": "C9300-48P"}),
+            {"FOC9": {"release": "17.9.4"}},
+        )
+        cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+"""
+This module contains the tests of the ApiCheckpoint of the maint_check.checkpoint module. The checkpoint file
+is truncated like the last gzip member of a crashed run to test the recovery of the completed chunks.
+"""
+
+import os
+import tempfile
+import unittest
+from maint_check.checkpoint import ApiCheckpoint, load_api_checkpoint
+
+__author__ = "Willi Kubny"
+__maintainer__ = "Willi Kubny"
+__license__ = "MIT"
+__email__ = "willi.kubny@kyndryl.com"
+__status__ = "Production"
+
+
+# The serials dict of the checkpoint tests
+SERIALS = {"FOC1": {"host": "sw01"}, "FOC2": {"host": "sw02"}}
+
+
+#### Tests ###################################################################################################
+
+
+class ApiCheckpointTest(unittest.TestCase):
+    """
+    Tests the gzip member journal of the checkpoint and the recovery of a truncated last member.
+    """
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.file = os.path.join(self.directory.name, "checkpoint", "api_checkpoint.jsonl.gz")
+        self.complete_size = 0
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def _write_checkpoint(self) -> ApiCheckpoint:
+        # Every chunk is flushed as its own gzip member and the size before the last member is kept
+        checkpoint = ApiCheckpoint(file=self.file, chunks=1)
+        checkpoint.start(serials=SERIALS)
+        checkpoint.add(stage_name="sni_coverage_summary", deltas={"FOC1": {"covered": True}})
+        self.complete_size = os.path.getsize(self.file)
+        checkpoint.add(stage_name="sni_coverage_summary", deltas={"FOC2": {"covered": False}})
+
+        return checkpoint
+
+    def test_load(self) -> None:
+        """
+        All flushed chunks are loaded and the buffered chunks are flushed by flush().
+        """
+        checkpoint = self._write_checkpoint()
+        checkpoint.chunks = 10
+        checkpoint.add(stage_name="eox", deltas={"FOC1": {"eox": "2027"}})
+        self.assertNotIn("eox", load_api_checkpoint(file=self.file)[1])
+
+        checkpoint.flush()
+        serials, stage_deltas = load_api_checkpoint(file=self.file)
+
+        self.assertEqual(serials, SERIALS)
+        self.assertEqual(
+            stage_deltas,
+            {
+                "sni_coverage_summary": {"FOC1": {"covered": True}, "FOC2": {"covered": False}},
+                "eox": {"FOC1": {"eox": "2027"}},
+            },
+        )
+
+    def test_truncated_member(self) -> None:
+        """
+        A truncated last gzip member is ignored and all chunks of the complete members are recovered.
+        """
+        self._write_checkpoint()
+        # Cut the last gzip member in the middle of its compressed data like the write of a crashed run
+        with open(self.file, "rb+") as journal:
+            journal.truncate((self.complete_size + os.path.getsize(self.file)) // 2)
+
+        serials, stage_deltas = load_api_checkpoint(file=self.file)
+
+        self.assertEqual(serials, SERIALS)
+        self.assertEqual(stage_deltas, {"sni_coverage_summary": {"FOC1": {"covered": True}}})
+
+    def test_remove(self) -> None:
+        """
+        The checkpoint file is removed after all stages are completed.
+        """
+        checkpoint = self._write_checkpoint()
+        checkpoint.remove()
+
+        self.assertFalse(os.path.exists(self.file))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+"""
+This module contains the tests of the ApiStageScheduler of the maint_check.dispatch module. The API call
+functions of nornir_maze are replaced by local functions, so the tests run without the Cisco support APIs.
+"""
+
+import time
+import threading
+import unittest
+from collections import namedtuple
+from maint_check.dispatch import ApiStageScheduler
+
+__author__ = "Willi Kubny"
+__maintainer__ = "Willi Kubny"
+__license__ = "MIT"
+__email__ = "willi.kubny@kyndryl.com"
+__status__ = "Production"
+
+
+# The fields of the ApiStage of the maint_check.stages module, which imports the nornir_maze API calls
+Stage = namedtuple(
+    "Stage",
+    (
+        "name",
+        "title",
+        "endpoint",
+        "api_call",
+        "print_call",
+        "chunk_size",
+        "columns",
+        "depends_on",
+        "request_key",
+    ),
+)
+
+
+#### Functions ###############################################################################################
+
+
+def _coverage_call(serial_dict: dict, api_creds: tuple) -> dict:  # pylint: disable=unused-argument
+    # Every serial gets the same orderable PID, so the dependent stage has one request key only
+    for record in serial_dict.values():
+        record["coverage"] = {"orderable_pid": "C9300-48P"}
+
+    return serial_dict
+
+
+def _release_call(  # pylint: disable=unused-argument
+    serial_dict: dict, api_creds: tuple, requested: list, lock: threading.Lock
+) -> dict:
+    # The slow request keeps the serials of the same request key waiting until the checkpoint is resumed
+    time.sleep(0.2)
+    with lock:
+        requested.extend(serial_dict)
+    for record in serial_dict.values():
+        record["release"] = f"{record['coverage']['orderable_pid']}-17.9.4"
+
+    return serial_dict
+
+
+#### Tests ###################################################################################################
+
+
+class ApiStageSchedulerResumeTest(unittest.TestCase):
+    """
+    The tests of a resumed run of the ApiStageScheduler with the deltas of a checkpoint.
+    """
+
+    def setUp(self) -> None:
+        self.requested = []
+        lock = threading.Lock()
+        self.stages = (
+            Stage("coverage", "", "sni", _coverage_call, None, 50, (), None, lambda serial, record: serial),
+            Stage(
+                "release",
+                "",
+                "ss",
+                lambda serial_dict, api_creds: _release_call(serial_dict, api_creds, self.requested, lock),
+                None,
+                10,
+                (),
+                "coverage",
+                lambda serial, record: record["coverage"]["orderable_pid"],
+            ),
+        )
+        self.serials = {f"FOC{index:05d}": {"host": f"sw{index // 2}"} for index in range(400)}
+
+    def test_resumed_request_key_completes_waiting_serials(self) -> None:
+        """
+        A serial of the checkpoint resolves the request key of the live serials which are waiting for the
+        same request key, so every serial gets the delta of the dependent stage.
+        """
+        resumed = next(reversed(self.serials))
+        resume_deltas = {
+            "coverage": {resumed: {"coverage": {"orderable_pid": "C9300-48P"}}},
+            "release": {resumed: {"release": "C9300-48P-17.9.4"}},
+        }
+
+        stage_deltas = ApiStageScheduler(stages=self.stages, api_creds=(), workers=2).run(
+            serial_dict=self.serials, resume_deltas=resume_deltas
+        )
+
+        self.assertEqual(set(stage_deltas["release"]), set(self.serials))
+        self.assertTrue(all(delta for delta in stage_deltas["release"].values()))
+        self.assertLessEqual(len(self.requested), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+"""
+This module contains the tests of the AdaptiveRateLimiter and the HTTP 429 detection of the
+maint_check.ratelimit module. The clock of the rate limiter is replaced by a mock, so the tests do not wait.
+"""
+
+import unittest
+from unittest import mock
+import requests
+from maint_check.ratelimit import AdaptiveRateLimiter, DEFAULT_RETRY_AFTER, throttle_retry_after
+
+__author__ = "Willi Kubny"
+__maintainer__ = "Willi Kubny"
+__license__ = "MIT"
+__email__ = "willi.kubny@kyndryl.com"
+__status__ = "Production"
+
+
+#### Functions ###############################################################################################
+
+
+def _http_error(status_code: int, headers: dict = None) -> requests.HTTPError:
+    # A HTTPError of raise_for_status() with the response of the status code and the headers
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+
+    return requests.HTTPError(f"{status_code} Client Error", response=response)
+
+
+#### Tests ###################################################################################################
+
+
+class AdaptiveRateLimiterTest(unittest.TestCase):
+    """
+    Tests the rate of an endpoint after HTTP 429 responses and after successful requests.
+    """
+
+    def setUp(self) -> None:
+        self.clock = mock.patch("maint_check.ratelimit.time")
+        self.time = self.clock.start()
+        self.time.monotonic.return_value = 100.0
+        self.limiter = AdaptiveRateLimiter(budgets={"eox": 8.0})
+
+    def tearDown(self) -> None:
+        self.clock.stop()
+
+    def test_halving(self) -> None:
+        """
+        Every HTTP 429 response halves the rate of the endpoint down to a twentieth of its budget.
+        """
+        rates = []
+        for _ in range(6):
+            self.limiter.throttle(endpoint="eox", retry_after=0.0)
+            rates.append(self.limiter.rates["eox"])
+
+        self.assertEqual(rates, [4.0, 2.0, 1.0, 0.5, 0.4, 0.4])
+        self.assertEqual(self.limiter.throttled["eox"], 6)
+        self.assertEqual(self.limiter.rates["sni"], 5.0)
+
+    def test_recovery(self) -> None:
+        """
+        Every successful request increases the rate by a tenth of the budget up to the budget.
+        """
+        self.limiter.throttle(endpoint="eox", retry_after=0.0)
+        for _ in range(3):
+            self.limiter.success(endpoint="eox")
+        self.assertAlmostEqual(self.limiter.rates["eox"], 6.4)
+
+        for _ in range(3):
+            self.limiter.success(endpoint="eox")
+        self.assertEqual(self.limiter.rates["eox"], 8.0)
+
+    def test_pause(self) -> None:
+        """
+        The requests to a throttled endpoint wait for the Retry-After time and the other endpoints do not.
+        """
+        self.limiter.throttle(endpoint="eox", retry_after=3.0)
+
+        self.limiter.acquire(endpoint="eox")
+        self.limiter.acquire(endpoint="sni")
+
+        self.assertEqual([call.args[0] for call in self.time.sleep.call_args_list], [3.0, 0.0])
+
+    def test_throttle_retry_after(self) -> None:
+        """
+        Only a HTTP 429 response or a message with the HTTP 429 error prefix throttles the endpoint.
+        """
+        self.assertEqual(
+            throttle_retry_after(_http_error(status_code=429, headers={"Retry-After": "2"})), 2.0
+        )
+        self.assertEqual(throttle_retry_after(_http_error(status_code=429)), DEFAULT_RETRY_AFTER)
+        self.assertIsNone(throttle_retry_after(_http_error(status_code=500)))
+        self.assertEqual(
+            throttle_retry_after(SystemExit("429 Client Error: Too Many Requests for url")),
+            DEFAULT_RETRY_AFTER,
+        )
+        self.assertIsNone(throttle_retry_after(SystemExit("Serial FOC1429 is not covered")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,168 @@
+"""
+This module contains the tests of the entPhysicalTable parser of the maint_check.snmp module. The parser is
+fed with canned var-binds of pyasn1 values, so the tests run without an SNMP agent.
+"""
+
+import sys
+import types
+import unittest
+import importlib.util
+from unittest import mock
+
+try:
+    from pyasn1.type import namedval, univ
+except ImportError:
+    univ = None
+
+__author__ = "Willi Kubny"
+__maintainer__ = "Willi Kubny"
+__license__ = "MIT"
+__email__ = "willi.kubny@kyndryl.com"
+__status__ = "Production"
+
+
+# The entPhysicalTable OID of the ENTITY-MIB
+ENT_PHYSICAL_TABLE = "1.3.6.1.2.1.47.1.1.1.1"
+
+
+#### Functions ###############################################################################################
+
+
+def _import_snmp() -> types.ModuleType:
+    # The parser needs no Nornir, which maint_check.snmp only imports for the type hint of the nr_obj
+    modules = {}
+    if importlib.util.find_spec("nornir") is None:
+        modules = {"nornir": types.ModuleType("nornir"), "nornir.core": types.ModuleType("nornir.core")}
+        modules["nornir.core"].Nornir = object
+    with mock.patch.dict(sys.modules, modules):
+        return importlib.import_module("maint_check.snmp")
+
+
+def _var_binds(column: int, values: dict) -> list:
+    # The var-binds of a column with the OID of the column and the entPhysicalIndex of every value
+    return [
+        (univ.ObjectIdentifier(f"{ENT_PHYSICAL_TABLE}.{column}.{index}"), value)
+        for index, value in values.items()
+    ]
+
+
+#### Tests ###################################################################################################
+
+
+@unittest.skipIf(univ is None, "the SNMP parser tests need the pyasn1 package of pysnmp")
+class EntityTableParserTest(unittest.TestCase):
+    """
+    Tests the serials of a switch stack which are parsed from the entPhysicalTable var-binds.
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.snmp = _import_snmp()
+
+    def setUp(self) -> None:
+        # The PhysicalClass textual convention pretty prints the names of a loaded ENTITY-MIB
+        class PhysicalClass(univ.Integer):  # pylint: disable=too-many-ancestors
+            """
+            The entPhysicalClass value with the named values of the ENTITY-MIB.
+            """
+
+            namedValues = namedval.NamedValues(("chassis", 3), ("module", 9), ("stack", 11))
+
+        self.physical_class = PhysicalClass
+
+    def _column_var_binds(self, classes: type) -> dict:
+        # A switch stack with the index 1 contains two chassis, the module 1002 has a serial but no chassis
+        return {
+            "contained_in": _var_binds(
+                column=4,
+                values={
+                    1: univ.Integer(0),
+                    1000: univ.Integer(1),
+                    1001: univ.Integer(1),
+                    1002: univ.Integer(1000),
+                },
+            ),
+            "class": _var_binds(
+                column=5,
+                values={index: classes(value) for index, value in ((1, 11), (1000, 3), (1001, 3), (1002, 9))},
+            ),
+            "parent_rel_pos": _var_binds(
+                column=6,
+                values={
+                    1: univ.Integer(-1),
+                    1000: univ.Integer(1),
+                    1001: univ.Integer(2),
+                    1002: univ.Integer(1),
+                },
+            ),
+            "software_rev": _var_binds(
+                column=10, values={1000: univ.OctetString("17.9.4"), 1001: univ.OctetString("")}
+            ),
+            "serial_num": _var_binds(
+                column=11,
+                values={
+                    1000: univ.OctetString("FOC1000"),
+                    1001: univ.OctetString("FOC1001 "),
+                    1002: univ.OctetString("FOC1002"),
+                },
+            ),
+        }
+
+    def test_named_values(self) -> None:
+        """
+        The chassis are found by the raw entPhysicalClass value, even if the class pretty prints as chassis.
+        """
+        self.assertEqual(self.physical_class(3).prettyPrint(), "chassis")
+        table = self.snmp.entity_var_binds_to_table(
+            column_var_binds=self._column_var_binds(self.physical_class)
+        )
+        self.assertEqual(table[1]["class"], self.snmp.ENT_PHYSICAL_CLASS_STACK)
+
+        serials = self.snmp.entity_table_to_serials(host="sw01", table=table, desired_version="17.12.4")
+
+        self.assertEqual(
+            serials,
+            {
+                "FOC1000": {
+                    "host": "sw01",
+                    "nr_data": {"switch_num": "1", "current_version": "17.9.4", "desired_version": "17.12.4"},
+                },
+                "FOC1001": {
+                    "host": "sw01",
+                    "nr_data": {"switch_num": "2", "current_version": "17.9.4", "desired_version": "17.12.4"},
+                },
+            },
+        )
+
+    def test_plain_integers(self) -> None:
+        """
+        The same chassis are found with the plain INTEGER values of an agent without a loaded ENTITY-MIB.
+        """
+        table = self.snmp.entity_var_binds_to_table(column_var_binds=self._column_var_binds(univ.Integer))
+
+        serials = self.snmp.entity_table_to_serials(host="sw01", table=table, desired_version="17.12.4")
+
+        self.assertEqual(sorted(serials), ["FOC1000", "FOC1001"])
+        self.assertEqual(serials["FOC1001"]["nr_data"]["switch_num"], "2")
+
+    def test_standalone_chassis(self) -> None:
+        """
+        A chassis which is not contained in a switch stack has no switch number.
+        """
+        table = self.snmp.entity_var_binds_to_table(
+            column_var_binds={
+                "contained_in": _var_binds(column=4, values={1: univ.Integer(0)}),
+                "class": _var_binds(column=5, values={1: self.physical_class(3)}),
+                "software_rev": _var_binds(column=10, values={1: univ.OctetString("17.3.8a")}),
+                "serial_num": _var_binds(column=11, values={1: univ.OctetString("FGL2000")}),
+            }
+        )
+
+        serials = self.snmp.entity_table_to_serials(host="rt01", table=table, desired_version="17.9.5")
+
+        self.assertEqual(serials["FGL2000"]["nr_data"]["switch_num"], "")
+        self.assertEqual(serials["FGL2000"]["nr_data"]["current_version"], "17.3.8a")
+
+
+if __name__ == "__main__":
+    unittest.main()